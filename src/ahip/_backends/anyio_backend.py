@@ -1,12 +1,15 @@
 from ssl import SSLContext
 
 import anyio
+import sniffio
 
 from ._common import is_readable, LoopAbort
-from .async_backend import AsyncBackend, AsyncSocket
+from .async_backend import AsyncBackend, AsyncEvent, AsyncSocket
 
 BUFSIZE = 65536
 
+_background_tasks = set()
+
 
 # XX support connect_timeout and read_timeout
 
@@ -24,6 +27,66 @@ class AnyIOBackend(AsyncBackend):
 
         return AnyIOSocket(stream)
 
+    def create_event(self):
+        return AnyIOEvent()
+
+    def create_lock(self):
+        return anyio.create_lock()
+
+    async def sleep(self, seconds):
+        await anyio.sleep(seconds)
+
+    def spawn_system_task(self, async_fn, *args):
+        async_library = sniffio.current_async_library()
+        if async_library == "asyncio":
+            import asyncio
+
+            task = asyncio.get_event_loop().create_task(async_fn(*args))
+            # The event loop only keeps weak references to its tasks.
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        elif async_library == "trio":
+            from .trio_backend import trio_lowlevel
+
+            trio_lowlevel.spawn_system_task(async_fn, *args)
+        else:
+            raise NotImplementedError(
+                "can't spawn background tasks under {}".format(async_library)
+            )
+
+
+class AnyIOEvent(AsyncEvent):
+    # anyio's own Event.set() is a coroutine, but we need to be able to set
+    # events from synchronous code, so use the native event of whatever
+    # library we're running under and only rely on anyio for the timeout.
+    def __init__(self):
+        async_library = sniffio.current_async_library()
+        if async_library == "asyncio":
+            import asyncio
+
+            self._event = asyncio.Event()
+        elif async_library == "trio":
+            import trio
+
+            self._event = trio.Event()
+        elif async_library == "curio":
+            import curio
+
+            self._event = curio.UniversalEvent()
+        else:
+            raise RuntimeError("unsupported async library {}".format(async_library))
+
+    def set(self):
+        self._event.set()
+
+    def is_set(self):
+        return self._event.is_set()
+
+    async def wait(self, timeout):
+        async with anyio.move_on_after(timeout):
+            await self._event.wait()
+        return self._event.is_set()
+
 
 # XX it turns out that we don't need SSLStream to be robustified against
 # cancellation, but we probably should do something to detect when the stream
@@ -44,9 +107,15 @@ class AnyIOSocket(AsyncSocket):
     def getpeercert(self, binary_form=False):
         return self._stream.getpeercert(binary_form=binary_form)
 
+    def selected_alpn_protocol(self):
+        return self._stream.alpn_protocol
+
     async def receive_some(self, read_timeout):
         return await self._stream.receive_some(BUFSIZE)
 
+    async def send_all(self, data):
+        await self._stream.send_all(data)
+
     async def send_and_receive_for_a_while(
         self, produce_bytes, consume_bytes, read_timeout
     ):
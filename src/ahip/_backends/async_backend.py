@@ -15,6 +15,55 @@ class AsyncBackend(ABC):
     ) -> "AsyncSocket":
         raise NotImplementedError()
 
+    @abstractmethod
+    def create_event(self) -> "AsyncEvent":
+        raise NotImplementedError()
+
+    @abstractmethod
+    def create_lock(self) -> Any:
+        """
+        Return a lock that tasks can hold with ``async with``.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def sleep(self, seconds: float) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def spawn_system_task(
+        self, async_fn: Callable[..., Awaitable[None]], *args: Any
+    ) -> None:
+        """
+        Run ``async_fn(*args)`` in the background, for as long as the event
+        loop is running. Raises :exc:`NotImplementedError` if this can't be
+        done from synchronous code.
+        """
+        raise NotImplementedError()
+
+
+class AsyncEvent(ABC):
+    """
+    A one-shot event that can be set from synchronous code (e.g. when a
+    connection is released back to its pool) and waited on by a task.
+    """
+
+    @abstractmethod
+    def set(self) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def is_set(self) -> bool:
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def wait(self, timeout: Optional[float]) -> bool:
+        """
+        Wait until the event is set or ``timeout`` seconds have passed, and
+        return whether the event was set.
+        """
+        raise NotImplementedError()
+
 
 class AsyncSocket(ABC):
     @abstractmethod
@@ -27,10 +76,22 @@ class AsyncSocket(ABC):
     def getpeercert(self, binary_form: bool = False) -> Union[bytes, Dict[str, Any]]:
         raise NotImplementedError()
 
+    @abstractmethod
+    def selected_alpn_protocol(self) -> Optional[str]:
+        raise NotImplementedError()
+
     @abstractmethod
     async def receive_some(self, read_timeout: Optional[float]) -> bytes:
         raise NotImplementedError()
 
+    @abstractmethod
+    async def send_all(self, data: bytes) -> None:
+        """
+        Send all of ``data``. One task may be sending while another one is
+        receiving.
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     async def send_and_receive_for_a_while(
         self,
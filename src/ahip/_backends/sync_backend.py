@@ -1,5 +1,7 @@
 import errno
 import socket
+import threading
+import time
 from ..util.connection import create_connection
 from ..util.ssl_ import ssl_wrap_socket
 from .. import util
@@ -23,6 +25,17 @@ class SyncBackend(object):
         )
         return SyncSocket(conn)
 
+    def create_lock(self):
+        return threading.Lock()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def spawn_system_task(self, fn, *args):
+        thread = threading.Thread(target=fn, args=args)
+        thread.daemon = True
+        thread.start()
+
 
 class SyncSocket(object):
     # _wait_for_socket is a hack for testing. See test_sync_connection.py for
@@ -33,6 +46,10 @@ class SyncSocket(object):
         # during the SSL handshake:
         self._sock.setblocking(False)
         self._wait_for_socket = _wait_for_socket
+        # One thread may be sending while another one is receiving, but an
+        # SSL object can't be used by both at once. Only the non-blocking
+        # calls are made with the lock held, and never the waiting.
+        self._io_lock = threading.Lock()
 
     def start_tls(self, server_hostname, ssl_context):
         self._sock.setblocking(True)
@@ -53,10 +70,16 @@ class SyncSocket(object):
         ):
             raise socket.timeout()  # XX use a backend-agnostic exception
 
+    def selected_alpn_protocol(self):
+        if not hasattr(self._sock, "selected_alpn_protocol"):
+            return None
+        return self._sock.selected_alpn_protocol()
+
     def receive_some(self, read_timeout):
         while True:
             try:
-                return self._sock.recv(BUFSIZE)
+                with self._io_lock:
+                    return self._sock.recv(BUFSIZE)
             except util.SSLWantReadError:
                 self._wait(readable=True, writable=False, timeout=read_timeout)
             except util.SSLWantWriteError:
@@ -67,6 +90,24 @@ class SyncSocket(object):
                 else:
                     raise
 
+    def send_all(self, data):
+        data = memoryview(data)
+        while data:
+            try:
+                with self._io_lock:
+                    sent = self._sock.send(data)
+            except util.SSLWantReadError:
+                self._wait(readable=True, writable=False)
+            except util.SSLWantWriteError:
+                self._wait(readable=False, writable=True)
+            except (OSError, socket.error) as exc:
+                if exc.errno in (errno.EWOULDBLOCK, errno.EAGAIN):
+                    self._wait(readable=False, writable=True)
+                else:
+                    raise
+            else:
+                data = data[sent:]
+
     def send_and_receive_for_a_while(self, produce_bytes, consume_bytes, read_timeout):
         outgoing_finished = False
         outgoing = b""
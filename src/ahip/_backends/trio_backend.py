@@ -1,10 +1,15 @@
+import math
+
 import trio
 
 from ._common import is_readable, LoopAbort
-from .async_backend import AsyncBackend, AsyncSocket
+from .async_backend import AsyncBackend, AsyncEvent, AsyncSocket
 
 BUFSIZE = 65536
 
+# trio.hazmat was renamed to trio.lowlevel in trio 0.15.0
+trio_lowlevel = getattr(trio, "lowlevel", None) or trio.hazmat
+
 
 # XX support connect_timeout and read_timeout
 
@@ -27,6 +32,34 @@ class TrioBackend(AsyncBackend):
 
         return TrioSocket(stream)
 
+    def create_event(self):
+        return TrioEvent()
+
+    def create_lock(self):
+        return trio.Lock()
+
+    async def sleep(self, seconds):
+        await trio.sleep(seconds)
+
+    def spawn_system_task(self, async_fn, *args):
+        trio_lowlevel.spawn_system_task(async_fn, *args)
+
+
+class TrioEvent(AsyncEvent):
+    def __init__(self):
+        self._event = trio.Event()
+
+    def set(self):
+        self._event.set()
+
+    def is_set(self):
+        return self._event.is_set()
+
+    async def wait(self, timeout):
+        with trio.move_on_after(math.inf if timeout is None else timeout):
+            await self._event.wait()
+        return self._event.is_set()
+
 
 # XX it turns out that we don't need SSLStream to be robustified against
 # cancellation, but we probably should do something to detect when the stream
@@ -51,9 +84,17 @@ class TrioSocket(AsyncSocket):
     def getpeercert(self, binary_form=False):
         return self._stream.getpeercert(binary_form=binary_form)
 
+    def selected_alpn_protocol(self):
+        if not isinstance(self._stream, trio.SSLStream):
+            return None
+        return self._stream.selected_alpn_protocol()
+
     async def receive_some(self, read_timeout):
         return await self._stream.receive_some(BUFSIZE)
 
+    async def send_all(self, data):
+        await self._stream.send_all(data)
+
     async def send_and_receive_for_a_while(
         self, produce_bytes, consume_bytes, read_timeout
     ):
@@ -101,6 +101,10 @@ class RecentlyUsedContainer(MutableMapping):
         with self.lock:
             return list(iterkeys(self._container))
 
+    def values(self):
+        with self.lock:
+            return list(itervalues(self._container))
+
 
 class HTTPHeaderDict(MutableMapping):
     """
@@ -34,6 +34,7 @@ from .exceptions import (
 )
 from .packages import six
 from .util import ssl_ as ssl_util
+from .util.timeout import current_time
 from .util.unasync import await_if_coro, anext, ASYNC_MODE
 from ._backends._common import LoopAbort
 from ._backends._loader import load_backend, normalize_backend
@@ -234,7 +235,9 @@ def _build_tunnel_request(host, port, headers):
     return tunnel_request
 
 
-async def _start_http_request(request, state_machine, sock, read_timeout=None):
+async def _start_http_request(
+    request, state_machine, sock, read_timeout=None, stats=None
+):
     """
     Send the request using the given state machine and connection, wait
     for the response headers, and return them.
@@ -245,6 +248,8 @@ async def _start_http_request(request, state_machine, sock, read_timeout=None):
 
     This is a standalone function because we use it both to set up both
     CONNECT requests and real requests.
+
+    If ``stats`` is given, the bytes sent and received are counted in it.
     """
     # Before we begin, confirm that the state machine is ok.
     if (
@@ -260,13 +265,18 @@ async def _start_http_request(request, state_machine, sock, read_timeout=None):
 
     async def produce_bytes():
         try:
-            return await anext(request_bytes_iterable)
+            data = await anext(request_bytes_iterable)
+            if stats is not None:
+                stats.increment("sent_bytes", len(data))
+            return data
         except StopAsyncIteration:
             # We successfully sent the whole body!
             context["send_aborted"] = False
             return None
 
     def consume_bytes(data):
+        if stats is not None:
+            stats.increment("received_bytes", len(data))
         state_machine.receive_data(data)
         while True:
             event = state_machine.next_event()
@@ -298,7 +308,7 @@ async def _start_http_request(request, state_machine, sock, read_timeout=None):
     return context["h11_response"]
 
 
-async def _read_until_event(state_machine, sock, read_timeout):
+async def _read_until_event(state_machine, sock, read_timeout, stats=None):
     """
     A loop that keeps issuing reads and feeding the data into h11 and
     checking whether h11 has an event for us. The moment there is an event
@@ -308,7 +318,127 @@ async def _read_until_event(state_machine, sock, read_timeout):
         event = state_machine.next_event()
         if event is not h11.NEED_DATA:
             return event
-        state_machine.receive_data(await sock.receive_some(read_timeout))
+        data = await sock.receive_some(read_timeout)
+        if stats is not None:
+            stats.increment("received_bytes", len(data))
+        state_machine.receive_data(data)
+
+
+class _BufferedBody(object):
+    """
+    The body of a response that was read in full off the connection, such as
+    a pipelined one. It has the same interface as :class:`HTTP1Connection`
+    has for the response it is reading.
+    """
+
+    complete = True
+
+    def __init__(self, chunks):
+        self._chunks = collections.deque(chunks)
+
+    def __aiter__(self):
+        return self
+
+    def next(self):  # Platform-specific: Python 2.7
+        return self.__next__()
+
+    async def __anext__(self):
+        if not self._chunks:
+            raise StopAsyncIteration
+        return self._chunks.popleft()
+
+
+def _pipelined_state_machine(request):
+    """
+    Return a fresh h11 state machine that the whole of ``request``, which must
+    have no body, has been sent with, and the bytes to send.
+    """
+    state_machine = h11.Connection(our_role=h11.CLIENT)
+    data = state_machine.send(
+        h11.Request(
+            method=request.method,
+            target=request.target,
+            headers=_stringify_headers(request.headers.items()),
+        )
+    )
+    data += state_machine.send(h11.EndOfMessage())
+    return state_machine, data
+
+
+def _feed_trailing_data(from_state_machine, to_state_machine):
+    """
+    Feed the data ``from_state_machine`` received past its response into
+    ``to_state_machine``.
+    """
+    data, closed = from_state_machine.trailing_data
+    # Careful, receiving b"" means that the connection was closed.
+    if data:
+        to_state_machine.receive_data(data)
+    if closed:
+        to_state_machine.receive_data(b"")
+
+
+async def _send_pipelined_requests(data, state_machine, sock, read_timeout, stats):
+    """
+    Send ``data``, all of the pipelined requests, and feed anything that the
+    server sends in the meantime to the state machine of the first one.
+
+    If sending fails, it returns quietly as long as the server sent us
+    something, so that the responses that made it can still be read.
+    """
+    context = {"produced": False, "sent": False, "received": False}
+
+    async def produce_bytes():
+        if context["produced"]:
+            # We're asked for more only once all of it went out.
+            context["sent"] = True
+            return None
+        context["produced"] = True
+        if stats is not None:
+            stats.increment("sent_bytes", len(data))
+        return data
+
+    def consume_bytes(data):
+        if stats is not None:
+            stats.increment("received_bytes", len(data))
+        context["received"] = True
+        state_machine.receive_data(data)
+        # Responses are only read once everything is sent, or else the
+        # requests that are still unsent could be lost.
+        if context["sent"]:
+            raise LoopAbort
+
+    try:
+        await sock.send_and_receive_for_a_while(
+            produce_bytes, consume_bytes, read_timeout
+        )
+    except socket.timeout:
+        raise
+    except socket.error:
+        if not context["received"]:
+            raise
+
+
+async def _read_whole_response(state_machine, sock, read_timeout, stats):
+    """
+    Read a whole response off the connection, and return the h11 response and
+    the chunks of its body.
+    """
+    h11_response = None
+    chunks = []
+    while True:
+        event = await _read_until_event(state_machine, sock, read_timeout, stats)
+        if isinstance(event, h11.InformationalResponse):
+            # Ignore 1xx responses
+            continue
+        elif isinstance(event, h11.Response):
+            h11_response = event
+        elif isinstance(event, h11.Data):
+            chunks.append(bytes(event.data))
+        elif isinstance(event, h11.EndOfMessage):
+            return h11_response, chunks
+        else:
+            raise ProtocolError("Connection closed before the response ended")
 
 
 _DEFAULT_SOCKET_OPTIONS = object()
@@ -330,6 +460,10 @@ class HTTP1Connection(object):
     data. Buffering of response data must happen at a higher layer.
     """
 
+    #: Whether the connection can carry more than one request at a time. Only
+    #: an :class:`hip.http2.HTTP2Connection` that speaks HTTP/2 can.
+    multiplexed = False
+
     #: Disable Nagle's algorithm by default.
     #: ``[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]``
     default_socket_options = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
@@ -361,6 +495,9 @@ class HTTP1Connection(object):
         self._tunnel_headers = tunnel_headers
         self._sock = None
         self._state_machine = None
+        #: A :class:`hip.util.metrics.PoolStats` that connect and TLS
+        #: handshake times and bytes transferred are recorded in, if set.
+        self.stats = None
 
     async def _wrap_socket(self, sock, ssl_context, fingerprint, assert_hostname):
         """
@@ -418,10 +555,87 @@ class HTTP1Connection(object):
         Given a Request object, performs the logic required to get a response.
         """
         h11_response = await _start_http_request(
-            request, self._state_machine, self._sock, read_timeout
+            request, self._state_machine, self._sock, read_timeout, self.stats
         )
         return _response_from_h11(h11_response, self)
 
+    async def send_pipelined_requests(self, requests, read_timeout):
+        """
+        Send all of the given Request objects, which must have no body, at
+        once, and then read their responses in order.
+
+        Returns the responses, with their bodies already read. If the server
+        closes the connection part way through, only the responses before that
+        are returned, and the remaining requests have to be sent again on
+        another connection. The connection is then closed, and so it is if
+        the server asked for that. Otherwise, it can be reused.
+        """
+        # Before we begin, confirm that the state machine is ok.
+        if not self.complete:
+            raise ProtocolError("Invalid internal state transition")
+
+        state_machines = []
+        data = []
+        for request in requests:
+            state_machine, request_data = _pipelined_state_machine(request)
+            state_machines.append(state_machine)
+            data.append(request_data)
+
+        # Anything left over from the previous response belongs to the first
+        # pipelined one.
+        _feed_trailing_data(self._state_machine, state_machines[0])
+
+        await _send_pipelined_requests(
+            b"".join(data), state_machines[0], self._sock, read_timeout, self.stats
+        )
+
+        responses = []
+        for i, state_machine in enumerate(state_machines):
+            try:
+                h11_response, chunks = await _read_whole_response(
+                    state_machine, self._sock, read_timeout, self.stats
+                )
+            except socket.timeout:
+                self.close()
+                raise
+            except (socket.error, h11.RemoteProtocolError, ProtocolError) as e:
+                # h11 also complains when the connection is closed part way
+                # through a response, but otherwise the server sent us
+                # something that isn't a response, and then the pipeline is
+                # out of sync.
+                closed = (
+                    not isinstance(e, h11.RemoteProtocolError)
+                    or state_machine.trailing_data[1]
+                )
+                if not responses or not closed:
+                    self.close()
+                    raise
+                # The server went away part way through the pipeline.
+                break
+
+            responses.append(_response_from_h11(h11_response, _BufferedBody(chunks)))
+            if state_machine.their_state is not h11.DONE:
+                # The server is closing the connection after this one.
+                break
+
+            # Hand whatever came after this response on to the next one.
+            if i + 1 < len(state_machines):
+                _feed_trailing_data(state_machine, state_machines[i + 1])
+
+        if len(responses) < len(requests):
+            self.close()
+            return responses
+
+        if state_machines[-1].trailing_data[0]:
+            # There's more than we asked for, so one of the responses must
+            # have been framed differently than we thought.
+            self.close()
+            raise ProtocolError("Received more responses than requests sent")
+
+        self._state_machine = state_machines[-1]
+        self._reset()
+        return responses
+
     async def _tunnel(self, sock):
         """
         This method establishes a CONNECT tunnel shortly after connection.
@@ -436,7 +650,7 @@ class HTTP1Connection(object):
         tunnel_state_machine = h11.Connection(our_role=h11.CLIENT)
 
         h11_response = await _start_http_request(
-            tunnel_request, tunnel_state_machine, sock
+            tunnel_request, tunnel_state_machine, sock, stats=self.stats
         )
         # XX this is wrong -- 'self' here will try to iterate using
         # self._state_machine, not tunnel_state_machine. Also, we need to
@@ -476,6 +690,7 @@ class HTTP1Connection(object):
         # This was factored out into a separate function to allow overriding
         # by subclasses, but in the backend approach the way to to this is to
         # provide a custom backend. (Composition >> inheritance.)
+        start = current_time()
         try:
             self._sock = await self._backend.connect(
                 self._host, self._port, connect_timeout, **extra_kw
@@ -496,13 +711,19 @@ class HTTP1Connection(object):
                 self, "Failed to establish a new connection: %s" % e
             )
 
+        if self.stats is not None:
+            self.stats.observe("connect_seconds", current_time() - start)
+
         if ssl_context is not None:
             if self._tunnel_host is not None:
                 self._tunnel(self._sock)
 
+            start = current_time()
             self._sock = await self._wrap_socket(
                 self._sock, ssl_context, fingerprint, assert_hostname
             )
+            if self.stats is not None:
+                self.stats.observe("tls_handshake_seconds", current_time() - start)
 
     def close(self):
         """
@@ -553,7 +774,7 @@ class HTTP1Connection(object):
         Iterate over the body bytes of the response until end of message.
         """
         event = await _read_until_event(
-            self._state_machine, self._sock, self.read_timeout
+            self._state_machine, self._sock, self.read_timeout, self.stats
         )
         if isinstance(event, h11.Data):
             return bytes(event.data)
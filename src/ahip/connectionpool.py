@@ -2,7 +2,9 @@ from __future__ import absolute_import
 import errno
 import logging
 import sys
+import threading
 import warnings
+import weakref
 
 from socket import error as SocketError, timeout as SocketTimeout
 import socket
@@ -30,8 +32,11 @@ from .packages.six.moves import queue
 from .request import RequestMethods
 from .response import HTTPResponse
 from .connection import HTTP1Connection
+from .http2 import HAS_H2, HTTP2Connection, HTTP2Stream
+from ._backends._loader import load_backend, normalize_backend
 
 from .util.connection import is_connection_dropped
+from .util.metrics import PoolStats, render_openmetrics
 from .util.request import set_file_position
 from .util.retry import Retry
 from .util.ssl_ import (
@@ -41,14 +46,15 @@ from .util.ssl_ import (
     resolve_cert_reqs,
     BaseSSLError,
 )
-from .util.timeout import Timeout
+from .util.timeout import Timeout, current_time
 from .util.url import (
     parse_url,
     Url,
     _normalize_host as normalize_host,
     _encode_target,
 )
-from .util.queue import LifoQueue
+from .util.queue import AsyncLifoQueue, LifoQueue
+from .util.unasync import await_if_coro, ASYNC_MODE
 
 try:
     import ssl
@@ -126,7 +132,8 @@ class ConnectionPool(object):
     """
 
     scheme = None
-    QueueCls = LifoQueue
+    # In async mode, waiting on a thread queue would block the event loop.
+    QueueCls = AsyncLifoQueue if ASYNC_MODE else LifoQueue
 
     def __init__(self, host, port=None):
         if not host:
@@ -195,7 +202,16 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         a time. When no free connections are available, the call will block
         until a connection has been released. This is a useful side effect for
         particular multithreaded situations where one does not want to use more
-        than maxsize connections per host to prevent flooding.
+        than maxsize connections per host to prevent flooding. In async mode
+        only the waiting task is blocked. Released connections are handed to
+        the waiting requests in the order given by ``checkout_order``.
+
+    :param checkout_order:
+        The order in which requests waiting for a connection get one, when
+        ``block`` is true: ``"fifo"`` (the default) serves them first come,
+        first served, and ``"deadline"`` serves the ones whose
+        ``pool_timeout`` runs out the soonest first. Either way, requests with
+        a lower ``priority`` (see :meth:`urlopen`) are served first.
 
     :param headers:
         Headers to include with all requests, unless other headers are given
@@ -204,6 +220,32 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
     :param retries:
         Retry configuration to use by default with requests in this pool.
 
+    :param max_idle_time:
+        If set, pooled connections that have been idle for longer than this
+        many seconds are closed. A reaper checks the pool in the background
+        (on a daemon thread in sync mode, or as a system task of the backend
+        in async mode), and also closes idle connections that were dropped
+        by the server, so that they are not found at checkout time.
+
+    :param max_idle_connections:
+        If set, at most this many idle connections are kept in the pool. The
+        least recently used connections beyond that are closed as soon as
+        they are put back.
+
+    :param min_idle:
+        If set, the reaper keeps at least this many connected, idle
+        connections in the pool, opening new ones in the background as
+        needed. It can't be larger than ``maxsize``. See also :meth:`prefill`.
+
+    :param http2:
+        If true, use HTTP/2, which requires the h2 package. Over plain HTTP,
+        the server has to be known to support it (prior knowledge), and over
+        HTTPS, it is negotiated with ALPN, falling back to HTTP/1.1. An HTTP/2
+        connection goes back into the pool as soon as a request is sent on
+        it, so that concurrent requests share it rather than each opening a
+        connection of their own. See :class:`hip.http2.HTTP2Connection` for
+        tuning its flow control windows.
+
     :param _proxy:
         Parsed proxy URL, should not be used directly, instead, see
         :class:`hip.connectionpool.ProxyManager`"
@@ -221,6 +263,9 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
     ConnectionCls = HTTP1Connection
     ResponseCls = HTTPResponse
 
+    #: How often, in seconds, the reaper checks on the pool at most.
+    REAPER_INTERVAL = 1.0
+
     def __init__(
         self,
         host,
@@ -232,6 +277,11 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         retries=None,
         _proxy=None,
         _proxy_headers=None,
+        max_idle_time=None,
+        max_idle_connections=None,
+        min_idle=None,
+        checkout_order="fifo",
+        http2=False,
         **conn_kw
     ):
         ConnectionPool.__init__(self, host, port)
@@ -246,8 +296,39 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         self.timeout = timeout
         self.retries = retries
 
-        self.pool = self.QueueCls(maxsize)
+        if checkout_order not in ("fifo", "deadline"):
+            raise ValueError("Unknown checkout_order: %r" % (checkout_order,))
+
+        if min_idle is not None and min_idle > maxsize:
+            raise ValueError(
+                "min_idle (%r) can't be larger than maxsize (%r)" % (min_idle, maxsize)
+            )
+
+        if http2 and not HAS_H2:
+            raise ImportError("HTTP/2 support requires the h2 package")
+
+        # There's no prior knowledge of a proxy speaking HTTP/2.
+        self.http2 = http2 and (_proxy is None or self.scheme == "https")
+        if self.http2 and not issubclass(self.ConnectionCls, HTTP2Connection):
+            self.ConnectionCls = HTTP2Connection
+
+        if ASYNC_MODE:
+            # Park waiting tasks on the same backend as the connections.
+            self.pool = self.QueueCls(maxsize, backend=conn_kw.get("backend"))
+        else:
+            self.pool = self.QueueCls(maxsize)
         self.block = block
+        self.checkout_order = checkout_order
+
+        self.max_idle_time = max_idle_time
+        self.max_idle_connections = max_idle_connections
+        self.min_idle = min_idle
+        # When each pooled connection was put back, for the idle reaper.
+        self._idle_since = {}
+        self._reaper_lock = threading.Lock()
+        self._reaper_running = False
+        self._reap_on_put = False
+        self._backend = None
 
         self.proxy = _proxy
         self.proxy_headers = _proxy_headers or {}
@@ -256,9 +337,8 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         for _ in xrange(maxsize):
             self.pool.put(None)
 
-        # These are mostly for testing and debugging purposes.
-        self.num_connections = 0
-        self.num_requests = 0
+        #: The :class:`hip.util.metrics.PoolStats` of this pool.
+        self.stats = PoolStats()
         self.conn_kw = conn_kw
 
         if self.proxy:
@@ -267,11 +347,28 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             # list.
             self.conn_kw.setdefault("socket_options", [])
 
+    # These are mostly for testing and debugging purposes.
+    @property
+    def num_connections(self):
+        return self.stats["connections_created"]
+
+    @property
+    def num_requests(self):
+        return self.stats["requests"]
+
+    def render_metrics(self):
+        """
+        Return the :attr:`stats` of this pool in the OpenMetrics text format,
+        labelled with its scheme, host and port.
+        """
+        labels = [("scheme", self.scheme), ("host", self.host), ("port", self.port)]
+        return render_openmetrics([(labels, self.stats.snapshot())])
+
     def _new_conn(self):
         """
         Return a fresh connection.
         """
-        self.num_connections += 1
+        self.stats.increment("connections_created")
         log.debug(
             "Starting new HTTP connection (%d): %s:%s",
             self.num_connections,
@@ -280,9 +377,28 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         )
 
         conn = self.ConnectionCls(host=self.host, port=self.port, **self.conn_kw)
+        conn.stats = self.stats
         return conn
 
-    async def _get_conn(self, timeout=None):
+    def _get_backend(self):
+        # Loaded lazily, because in async mode the backend may have to be
+        # sniffed from the running event loop.
+        if self._backend is None:
+            self._backend = load_backend(
+                normalize_backend(self.conn_kw.get("backend"), ASYNC_MODE)
+            )
+        return self._backend
+
+    def _is_idle_expired(self, conn, now):
+        idle_since = self._idle_since.get(conn)
+        return (
+            not _is_busy(conn)
+            and self.max_idle_time is not None
+            and idle_since is not None
+            and now - idle_since > self.max_idle_time
+        )
+
+    async def _get_conn(self, timeout=None, priority=0):
         """
         Get a connection. Will return a pooled connection if one is available.
 
@@ -293,10 +409,22 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             Seconds to wait before giving up and raising
             :class:`hip.exceptions.EmptyPoolError` if the pool is empty and
             :prop:`.block` is ``True``.
+
+        :param priority:
+            Where to wait in line for a connection, see :meth:`urlopen`.
         """
         conn = None
+        start = current_time()
+        if self.checkout_order == "deadline" and timeout is not None:
+            key = (priority, start + timeout)
+        elif self.checkout_order == "deadline":
+            key = (priority, float("inf"))
+        else:
+            key = (priority, 0)
         try:
-            conn = self.pool.get(block=self.block, timeout=timeout)
+            conn = await await_if_coro(
+                self.pool.get(block=self.block, timeout=timeout, key=key)
+            )
 
         except AttributeError:  # self.pool is None
             raise ClosedPoolError(self, "Pool is closed.")
@@ -309,10 +437,39 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
                 )
             pass  # Oh well, we'll create a new connection then
 
-        # If this is a persistent connection, check if it got disconnected
-        if conn and is_connection_dropped(conn):
-            log.debug("Resetting dropped connection: %s", self.host)
+        finally:
+            self.stats.observe("checkout_wait_seconds", current_time() - start)
+
+        if conn and conn.multiplexed:
+            # Take in what the server sent while the connection was idle,
+            # such as it going away.
+            await conn.poll()
+
+        # If this is a persistent connection, check if it expired or got
+        # disconnected
+        reused = False
+        if conn and self._is_idle_expired(conn, current_time()):
+            log.debug("Resetting idle connection: %s", self.host)
+            self.stats.increment("connections_dropped")
             conn.close()
+        elif conn and is_connection_dropped(conn):
+            log.debug("Resetting dropped connection: %s", self.host)
+            self.stats.increment("connections_dropped")
+            if _is_busy(conn):
+                # The requests on it are left to finish, after which it
+                # closes by itself.
+                conn = None
+            else:
+                conn.close()
+        elif conn:
+            reused = True
+
+        if conn:
+            self._idle_since.pop(conn, None)
+        self.stats.increment("checkout_hits" if reused else "checkout_misses")
+
+        if self.min_idle:
+            self._start_reaper()
 
         return conn or self._new_conn()
 
@@ -330,26 +487,166 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
 
         If the pool is closed, then the connection will be closed and discarded.
         """
+        if isinstance(conn, HTTP2Stream):
+            # A response on a multiplexed connection only holds on to its
+            # stream, as the connection went back when the request was sent.
+            return
+
+        if conn:
+            self._idle_since[conn] = current_time()
+
         try:
             self.pool.put(conn, block=False)
-            return  # Everything is dandy, done.
         except AttributeError:
             # self.pool is None.
             pass
         except queue.Full:
             # This should never happen if self.block == True
             log.warning("Connection pool is full, discarding connection: %s", self.host)
+            self.stats.increment("connections_discarded")
+        else:
+            # Everything is dandy, done.
+            if conn:
+                if self.max_idle_connections is not None or self._reap_on_put:
+                    self._reap_idle_conns(check_dropped=self._reap_on_put)
+                if self.max_idle_time is not None or self.min_idle:
+                    self._start_reaper()
+            return
 
         # Connection never got put back into the pool, close it.
         if conn:
+            self._idle_since.pop(conn, None)
             conn.close()
 
+    def _reap_idle_conns(self, check_dropped=True):
+        """
+        Close the pooled connections that have been idle for longer than
+        :attr:`max_idle_time` or that were dropped by the server, and the
+        least recently used ones beyond :attr:`max_idle_connections`.
+
+        Checking for dropped connections takes a syscall per connection, so
+        it is only done when ``check_dropped`` is true, and without holding
+        the lock of the queue.
+
+        Returns the number of connections that were closed.
+        """
+        pool = self.pool
+        if pool is None:
+            return 0
+
+        now = current_time()
+
+        def select(conns):
+            evicted = []
+            if self.max_idle_time is not None:
+                evicted = [conn for conn in conns if self._is_idle_expired(conn, now)]
+            if self.max_idle_connections is not None:
+                remaining = [
+                    conn for conn in conns if conn not in evicted and not _is_busy(conn)
+                ]
+                excess = len(remaining) - self.max_idle_connections
+                if excess > 0:
+                    evicted.extend(remaining[:excess])
+            return evicted
+
+        evicted = pool.evict(select)
+
+        if check_dropped and self.max_idle_time is not None:
+            dropped = set(
+                id(conn) for conn in pool.items() if is_connection_dropped(conn)
+            )
+            if dropped:
+                # Connections that were checked out in the meantime are no
+                # longer queued, and so they are left alone.
+                evicted.extend(
+                    pool.evict(
+                        lambda conns: [conn for conn in conns if id(conn) in dropped]
+                    )
+                )
+
+        for conn in evicted:
+            log.debug("Closing idle connection: %s", self.host)
+            self._idle_since.pop(conn, None)
+            conn.close()
+        return len(evicted)
+
+    def _start_reaper(self):
+        with self._reaper_lock:
+            if self._reaper_running or self._reap_on_put:
+                return
+
+            backend = self._get_backend()
+            interval = self.REAPER_INTERVAL
+            if self.max_idle_time is not None:
+                # Check a few times per max_idle_time, so that connections
+                # don't outlive it by much.
+                interval = max(min(self.max_idle_time / 4.0, interval), 0.01)
+            try:
+                backend.spawn_system_task(
+                    _reap_idle_conns_forever, weakref.ref(self), backend, interval
+                )
+            except NotImplementedError:
+                # Make do with reaping whenever a connection is put back.
+                self._reap_on_put = True
+            else:
+                self._reaper_running = True
+
     async def _start_conn(self, conn, connect_timeout):
         """
         Called right before a request is made, after the socket is created.
         """
         await conn.connect(connect_timeout=connect_timeout)
 
+    async def prefill(self, n=None, timeout=_Default):
+        """
+        Open connections ahead of time, until at least ``n`` connected ones
+        (by default, ``maxsize``) are idle in the pool.
+
+        The TCP connect and TLS handshake of each connection happen right
+        away, rather than inline during the first requests. The pool never
+        grows past ``maxsize``, so fewer connections are opened if some of
+        them are checked out.
+
+        :param timeout:
+            Overrides the pool's connect timeout. It may be a float (in
+            seconds) or an instance of :class:`hip.util.Timeout`.
+
+        Returns the number of connections opened.
+        """
+        pool = self.pool
+        if pool is None:
+            raise ClosedPoolError(self, "Pool is closed.")
+
+        if n is None or n > pool.maxsize:
+            n = pool.maxsize
+
+        opened = 0
+        # Without a free slot, the connection could only be thrown away.
+        while pool.filled_slots() < n and pool.free_slots():
+            conn = self._new_conn()
+            timeout_obj = self._get_timeout(timeout)
+            timeout_obj.start_connect()
+            try:
+                await self._start_conn(conn, timeout_obj.connect_timeout)
+            except (BaseSSLError, CertificateError) as e:
+                conn.close()
+                raise SSLError(e)
+            except BaseException:
+                conn.close()
+                raise
+
+            self._idle_since[conn] = current_time()
+            if not pool.fill_slot(conn):
+                # All other connections are checked out.
+                self._idle_since.pop(conn, None)
+                conn.close()
+                break
+            opened += 1
+
+        if opened and (self.max_idle_time is not None or self.min_idle):
+            self._start_reaper()
+        return opened
+
     def _get_timeout(self, timeout):
         """ Helper that always returns a :class:`hip.util.Timeout` """
         if timeout is _Default:
@@ -404,7 +701,7 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             :class:`hip.util.Timeout`, which gives you more fine-grained
             control over your timeouts.
         """
-        self.num_requests += 1
+        self.stats.increment("requests")
 
         timeout_obj = self._get_timeout(timeout)
         timeout_obj.start_connect()
@@ -417,6 +714,82 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             self._raise_timeout(err=e, url=url, timeout_value=conn.timeout)
             raise
 
+        if conn.multiplexed:
+            # Other requests can be sent on the connection while this one is
+            # waiting for its response, which only holds on to its stream.
+            self._put_conn(conn)
+
+        request = self._build_request(method, url, headers, body)
+        read_timeout = self._read_timeout(conn, timeout_obj, url)
+
+        # Receive the response from the server
+        try:
+            response = await conn.send_request(request, read_timeout=read_timeout)
+        except (SocketTimeout, BaseSSLError, SocketError) as e:
+            self._raise_timeout(err=e, url=url, timeout_value=read_timeout)
+            raise
+
+        http_version = six.ensure_str(response.version)
+        log.debug(
+            '%s://%s:%s "%s %s %s" %s',
+            self.scheme,
+            self.host,
+            self.port,
+            method,
+            url,
+            http_version,
+            response.status_code,
+        )
+
+        return response
+
+    async def _make_pipelined_requests(
+        self, conn, method, urls, timeout=_Default, headers=None
+    ):
+        """
+        Send a body-less request for each of the ``urls`` at once on ``conn``,
+        and return the responses that came back, see
+        :meth:`hip.connection.HTTP1Connection.send_pipelined_requests`.
+        """
+        self.stats.increment("requests", len(urls))
+
+        timeout_obj = self._get_timeout(timeout)
+        timeout_obj.start_connect()
+
+        try:
+            await self._start_conn(conn, timeout_obj.connect_timeout)
+        except (SocketTimeout, BaseSSLError) as e:
+            self._raise_timeout(err=e, url=urls[0], timeout_value=conn.timeout)
+            raise
+
+        if conn.multiplexed:
+            self._put_conn(conn)
+
+        requests = [self._build_request(method, url, headers) for url in urls]
+        read_timeout = self._read_timeout(conn, timeout_obj, urls[0])
+
+        try:
+            responses = await conn.send_pipelined_requests(
+                requests, read_timeout=read_timeout
+            )
+        except (SocketTimeout, BaseSSLError, SocketError) as e:
+            self._raise_timeout(err=e, url=urls[0], timeout_value=read_timeout)
+            raise
+
+        for url, response in zip(urls, responses):
+            log.debug(
+                '%s://%s:%s "%s %s %s" %s (pipelined)',
+                self.scheme,
+                self.host,
+                self.port,
+                method,
+                url,
+                "HTTP/1.1",
+                response.status_code,
+            )
+        return responses
+
+    def _build_request(self, method, url, headers, body=None):
         # TODO: We need to encapsulate our proxy logic in here somewhere.
         request = Request(method=method, target=url, headers=headers, body=body)
 
@@ -430,7 +803,9 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         host = host.rstrip(".")
 
         request.add_host(host, port, scheme)
+        return request
 
+    def _read_timeout(self, conn, timeout_obj, url):
         # Reset the timeout for the recv() on the socket
         read_timeout = timeout_obj.read_timeout
 
@@ -446,27 +821,7 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         if read_timeout is Timeout.DEFAULT_TIMEOUT:
             read_timeout = socket.getdefaulttimeout()
         conn.read_timeout = read_timeout
-
-        # Receive the response from the server
-        try:
-            response = await conn.send_request(request, read_timeout=read_timeout)
-        except (SocketTimeout, BaseSSLError, SocketError) as e:
-            self._raise_timeout(err=e, url=url, timeout_value=read_timeout)
-            raise
-
-        http_version = "HTTP/1.1"
-        log.debug(
-            '%s://%s:%s "%s %s %s" %s',
-            self.scheme,
-            self.host,
-            self.port,
-            method,
-            url,
-            http_version,
-            response.status_code,
-        )
-
-        return response
+        return read_timeout
 
     def _absolute_url(self, path):
         return Url(scheme=self.scheme, host=self.host, port=self.port, path=path).url
@@ -479,10 +834,11 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             return
         # Disable access to the pool
         old_pool, self.pool = self.pool, None
+        self._idle_since.clear()
 
         try:
             while True:
-                conn = old_pool.get(block=False)
+                conn = old_pool.get_nowait()
                 if conn:
                     conn.close()
 
@@ -524,6 +880,7 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         pool_timeout=None,
         body_pos=None,
         preload_content=True,
+        priority=0,
         **response_kw
     ):
         """
@@ -583,6 +940,12 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         :param preload_content:
             If True, the response's body will be preloaded during construction.
 
+        :param priority:
+            If the pool is set to block=True and no connection is available,
+            requests with a lower priority get the next free connection
+            first. Defaults to 0, so that a negative priority can be given to
+            latency critical requests, and a positive one to bulk work.
+
         :param \\**response_kw:
             Additional parameters are passed to
             :meth:`hip.response.HTTPResponse.from_base`
@@ -599,12 +962,6 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
         else:
             url = six.ensure_str(parse_url(url).url)
 
-        conn = None
-
-        # Track whether `conn` needs to be released before
-        # returning/raising/recursing.
-        release_this_conn = False
-
         # Merge the proxy headers. Only do this in HTTP. We have to copy the
         # headers dict so we can safely change it without those changes being
         # reflected in anyone else's copy.
@@ -612,152 +969,335 @@ class HTTPConnectionPool(ConnectionPool, RequestMethods):
             headers = headers.copy()
             headers.update(self.proxy_headers)
 
-        # Must keep the exception bound to a separate variable or else Python 3
-        # complains about UnboundLocalError.
-        err = None
-
-        # Keep track of whether we cleanly exited the except block. This
-        # ensures we do proper cleanup in finally.
-        clean_exit = False
-
-        # Rewind body position, if needed. Record current position
-        # for future rewinds in the event of a redirect/retry.
-        body_pos = await set_file_position(body, body_pos)
-
         if body is not None:
             _add_transport_headers(headers)
 
-        try:
-            # Request a connection from the queue.
-            timeout_obj = self._get_timeout(timeout)
-            conn = await self._get_conn(timeout=pool_timeout)
-
-            conn.timeout = timeout_obj.connect_timeout
+        # Pass method to Response for length checking
+        response_kw["request_method"] = method
 
-            # Make the request on the base connection object.
-            base_response = await self._make_request(
-                conn, method, url, timeout=timeout_obj, body=body, headers=headers
-            )
+        # Every attempt is made by this loop, rather than by retrying
+        # recursively, so that retries neither grow the stack nor redo the
+        # setup above.
+        while True:
+            # Rewind body position, if needed. Record current position
+            # for future rewinds in the event of a retry.
+            body_pos = await set_file_position(body, body_pos)
 
-            # Pass method to Response for length checking
-            response_kw["request_method"] = method
+            conn = None
 
-            # Import httplib's response into our own wrapper object
-            response = self.ResponseCls.from_base(
-                base_response, pool=self, retries=retries, **response_kw
-            )
-            # If requested, preload the body.
-            if preload_content:
-                await response.preload_content()
+            # Track whether `conn` needs to be released before
+            # returning/raising/retrying.
+            release_this_conn = False
 
-            # Everything went great!
-            clean_exit = True
+            # Must keep the exception bound to a separate variable or else
+            # Python 3 complains about UnboundLocalError.
+            err = None
 
-        except queue.Empty:
-            # Timed out by queue.
-            raise EmptyPoolError(self, "No pool connections are available.")
-
-        except (
-            TimeoutError,
-            SocketError,
-            ProtocolError,
-            h11.ProtocolError,
-            BaseSSLError,
-            SSLError,
-            CertificateError,
-        ) as e:
-            # Discard the connection for these exceptions. It will be
-            # replaced during the next _get_conn() call.
+            # Keep track of whether we cleanly exited the except block. This
+            # ensures we do proper cleanup in finally.
             clean_exit = False
 
-            if isinstance(e, (BaseSSLError, CertificateError)):
-                e = SSLError(e)
-            elif isinstance(e, (SocketError, NewConnectionError)) and self.proxy:
-                e = ProxyError("Cannot connect to proxy.", e)
-            elif isinstance(e, (SocketError, h11.ProtocolError)):
-                e = ProtocolError("Connection aborted.", e)
+            try:
+                # Request a connection from the queue.
+                timeout_obj = self._get_timeout(timeout)
+                conn = await self._get_conn(timeout=pool_timeout, priority=priority)
 
-            retries = retries.increment(
-                method, url, error=e, _pool=self, _stacktrace=sys.exc_info()[2]
-            )
-            retries.sleep()
+                conn.timeout = timeout_obj.connect_timeout
 
-            # Keep track of the error for the retry warning.
-            err = e
+                # Make the request on the base connection object.
+                base_response = await self._make_request(
+                    conn, method, url, timeout=timeout_obj, body=body, headers=headers
+                )
+                # Import httplib's response into our own wrapper object
+                response = self.ResponseCls.from_base(
+                    base_response, pool=self, retries=retries, **response_kw
+                )
+                # If requested, preload the body.
+                if preload_content:
+                    await response.preload_content()
+
+                # Everything went great!
+                clean_exit = True
+
+            except queue.Empty:
+                # Timed out by queue.
+                raise EmptyPoolError(self, "No pool connections are available.")
+
+            except (
+                TimeoutError,
+                SocketError,
+                ProtocolError,
+                h11.ProtocolError,
+                BaseSSLError,
+                SSLError,
+                CertificateError,
+            ) as e:
+                # Discard the connection for these exceptions. It will be
+                # replaced during the next _get_conn() call.
+                clean_exit = False
+
+                if isinstance(e, (BaseSSLError, CertificateError)):
+                    e = SSLError(e)
+                elif isinstance(e, (SocketError, NewConnectionError)) and self.proxy:
+                    e = ProxyError("Cannot connect to proxy.", e)
+                elif isinstance(e, (SocketError, h11.ProtocolError)):
+                    e = ProtocolError("Connection aborted.", e)
+
+                retries = retries.increment(
+                    method, url, error=e, _pool=self, _stacktrace=sys.exc_info()[2]
+                )
+                self.stats.increment("retries")
+                retries.sleep()
+
+                # Keep track of the error for the retry warning.
+                err = e
+
+            finally:
+                if not clean_exit and conn is not None and conn.multiplexed:
+                    # The connection went back into the pool once connected.
+                    # Only the stream of this request failed, and the other
+                    # ones carry on. If the connection itself broke, that's
+                    # noticed when it's checked out next.
+                    conn = None
+                elif not clean_exit:
+                    # We hit some kind of exception, handled or otherwise. We
+                    # need to throw the connection away unless explicitly told
+                    # not to. Close the connection, set the variable to None,
+                    # and make sure we put the None back in the pool to avoid
+                    # leaking it.
+                    conn = conn and conn.close()
+                    release_this_conn = True
+
+                if release_this_conn:
+                    # Put the connection back to be reused. If the connection
+                    # is expired then it will be None, which will get replaced
+                    # with a fresh connection during _get_conn.
+                    self._put_conn(conn)
+
+            if not conn:
+                # Try again
+                log.warning(
+                    "Retrying (%r) after connection broken by '%r': %s",
+                    retries,
+                    err,
+                    url,
+                )
+                continue
 
-        finally:
-            if not clean_exit:
-                # We hit some kind of exception, handled or otherwise. We need
-                # to throw the connection away unless explicitly told not to.
-                # Close the connection, set the variable to None, and make sure
-                # we put the None back in the pool to avoid leaking it.
-                conn = conn and conn.close()
-                release_this_conn = True
-
-            if release_this_conn:
-                # Put the connection back to be reused. If the connection is
-                # expired then it will be None, which will get replaced with a
-                # fresh connection during _get_conn.
-                self._put_conn(conn)
-
-        if not conn:
-            # Try again
-            log.warning(
-                "Retrying (%r) after connection broken by '%r': %s", retries, err, url
-            )
-            return await self.urlopen(
-                method,
-                url,
-                body,
-                headers,
-                retries,
-                timeout=timeout,
-                pool_timeout=pool_timeout,
-                body_pos=body_pos,
-                preload_content=preload_content,
-                **response_kw
-            )
+            # Check if we should retry the HTTP response.
+            has_retry_after = bool(response.getheader("Retry-After"))
+            if not retries.is_retry(method, response.status, has_retry_after):
+                return response
 
-        async def drain_and_release_conn(response):
-            try:
-                # discard any remaining response body, the connection will be
-                # released back to the pool once the entire response is read
-                await response.read()
-            except (TimeoutError, SocketError, ProtocolError, BaseSSLError, SSLError):
-                pass
-
-        # Check if we should retry the HTTP response.
-        has_retry_after = bool(response.getheader("Retry-After"))
-        if retries.is_retry(method, response.status, has_retry_after):
             try:
                 retries = retries.increment(method, url, response=response, _pool=self)
             except MaxRetryError:
                 if retries.raise_on_status:
                     # Drain and release the connection for this response, since
                     # we're not returning it to be released manually.
-                    await drain_and_release_conn(response)
+                    await _drain_and_release_conn(response)
                     raise
                 return response
 
-            # drain and return the connection to the pool before recursing
-            await drain_and_release_conn(response)
+            # drain and return the connection to the pool before retrying
+            await _drain_and_release_conn(response)
+            self.stats.increment("retries")
 
             retries.sleep(response)
             log.debug("Retry: %s", url)
-            return await self.urlopen(
-                method,
-                url,
-                body,
-                headers,
-                retries=retries,
-                timeout=timeout,
-                pool_timeout=pool_timeout,
-                body_pos=body_pos,
-                preload_content=preload_content,
-                **response_kw
-            )
 
-        return response
+    async def pipeline(
+        self,
+        method,
+        urls,
+        headers=None,
+        retries=None,
+        timeout=_Default,
+        pool_timeout=None,
+        max_depth=None,
+        preload_content=True,
+        **response_kw
+    ):
+        """
+        Make a ``GET`` or ``HEAD`` request for each of the ``urls``, using
+        HTTP/1.1 pipelining: the requests are all sent on one connection at
+        once, and then their responses are read in order. On links with a high
+        round trip time, this is much faster than waiting for each response
+        before sending the next request, without opening more connections.
+
+        Returns the responses, in the order of ``urls``, with their bodies
+        already read from the connection.
+
+        If the server closes the connection part way through, which it may do
+        whenever it likes, the requests that didn't get a response are sent
+        again on another connection. That is safe because ``GET`` and ``HEAD``
+        requests are idempotent. Only connection errors with no response at
+        all count as retries, and status codes and redirects are not acted
+        upon.
+
+        :param max_depth:
+            Send at most this many requests at once on each connection. By
+            default, all of them are.
+
+        The other parameters are the same as for :meth:`urlopen`.
+        """
+        if method not in ("GET", "HEAD"):
+            raise ValueError("Only GET and HEAD requests can be pipelined")
+
+        if headers is None:
+            headers = self.headers
+
+        if not isinstance(retries, Retry):
+            retries = Retry.from_int(retries, default=self.retries, redirect=False)
+
+        targets = []
+        for url in urls:
+            if url.startswith("/"):
+                targets.append(six.ensure_str(_encode_target(url)))
+            else:
+                targets.append(six.ensure_str(parse_url(url).url))
+
+        if self.scheme == "http":
+            headers = headers.copy()
+            headers.update(self.proxy_headers)
+
+        response_kw["request_method"] = method
+
+        results = [None] * len(targets)
+        # The indices of the requests that don't have a response yet.
+        pending = list(range(len(targets)))
+        while pending:
+            batch = pending[:max_depth] if max_depth else pending
+            conn = None
+            base_responses = []
+            clean_exit = False
+
+            try:
+                timeout_obj = self._get_timeout(timeout)
+                conn = await self._get_conn(timeout=pool_timeout)
+
+                conn.timeout = timeout_obj.connect_timeout
+
+                base_responses = await self._make_pipelined_requests(
+                    conn,
+                    method,
+                    [targets[i] for i in batch],
+                    timeout=timeout_obj,
+                    headers=headers,
+                )
+                clean_exit = True
+
+            except queue.Empty:
+                # Timed out by queue.
+                raise EmptyPoolError(self, "No pool connections are available.")
+
+            except (
+                TimeoutError,
+                SocketError,
+                ProtocolError,
+                h11.ProtocolError,
+                BaseSSLError,
+                SSLError,
+                CertificateError,
+            ) as e:
+                if isinstance(e, (BaseSSLError, CertificateError)):
+                    e = SSLError(e)
+                elif isinstance(e, (SocketError, NewConnectionError)) and self.proxy:
+                    e = ProxyError("Cannot connect to proxy.", e)
+                elif isinstance(e, (SocketError, h11.ProtocolError)):
+                    e = ProtocolError("Connection aborted.", e)
+
+                retries = retries.increment(
+                    method,
+                    targets[batch[0]],
+                    error=e,
+                    _pool=self,
+                    _stacktrace=sys.exc_info()[2],
+                )
+                self.stats.increment("retries")
+                retries.sleep()
+                log.warning(
+                    "Retrying (%r) after connection broken by '%r': %s",
+                    retries,
+                    e,
+                    targets[batch[0]],
+                )
+
+            finally:
+                if conn is not None and conn.multiplexed:
+                    # The connection went back into the pool once connected,
+                    # and its other streams carry on.
+                    pass
+                else:
+                    if not clean_exit or is_connection_dropped(conn):
+                        # The connection is closed if the server went away
+                        # part way through, so it's replaced by a fresh one.
+                        conn = conn and conn.close()
+                    # All the bodies have been read, so the connection can go
+                    # back right away.
+                    self._put_conn(conn)
+
+            for i, base_response in zip(batch, base_responses):
+                response = self.ResponseCls(
+                    body=base_response.body,
+                    headers=base_response.headers,
+                    status=base_response.status_code,
+                    version=base_response.version,
+                    original_response=base_response,
+                    pool=self,
+                    retries=retries,
+                    request_url=targets[i],
+                    **response_kw
+                )
+                if preload_content:
+                    await response.preload_content()
+                results[i] = response
+            pending = pending[len(base_responses) :]
+
+        return results
+
+
+def _is_busy(conn):
+    """
+    Whether ``conn`` is carrying requests while it's in the pool, which
+    multiplexed connections do.
+    """
+    return conn.multiplexed and conn.active_streams > 0
+
+
+async def _drain_and_release_conn(response):
+    try:
+        # discard any remaining response body, the connection will be
+        # released back to the pool once the entire response is read
+        await response.read()
+    except (TimeoutError, SocketError, ProtocolError, BaseSSLError, SSLError):
+        pass
+
+
+async def _reap_idle_conns_forever(pool_ref, backend, interval):
+    """
+    Periodically reap the idle connections of a pool and top them back up to
+    ``min_idle``, for as long as the pool is alive and open. Only holds a weak
+    reference to the pool in between, so that it can still be garbage
+    collected.
+    """
+    try:
+        while True:
+            await backend.sleep(interval)
+            pool = pool_ref()
+            if pool is None or pool.pool is None:
+                return
+            try:
+                pool._reap_idle_conns()
+                if pool.min_idle:
+                    await pool.prefill(pool.min_idle)
+            except Exception:
+                log.warning("Failed to maintain idle connections", exc_info=True)
+            pool = None
+    finally:
+        pool = pool_ref()
+        if pool is not None:
+            pool._reaper_running = False
 
 
 class HTTPSConnectionPool(HTTPConnectionPool):
@@ -791,6 +1331,11 @@ class HTTPSConnectionPool(HTTPConnectionPool):
         retries=None,
         _proxy=None,
         _proxy_headers=None,
+        max_idle_time=None,
+        max_idle_connections=None,
+        min_idle=None,
+        checkout_order="fifo",
+        http2=False,
         key_file=None,
         cert_file=None,
         cert_reqs=None,
@@ -816,6 +1361,11 @@ class HTTPSConnectionPool(HTTPConnectionPool):
             retries,
             _proxy,
             _proxy_headers,
+            max_idle_time=max_idle_time,
+            max_idle_connections=max_idle_connections,
+            min_idle=min_idle,
+            checkout_order=checkout_order,
+            http2=http2,
             **conn_kw
         )
 
@@ -832,6 +1382,8 @@ class HTTPSConnectionPool(HTTPConnectionPool):
             ca_cert_dir=ca_cert_dir,
             ssl_version=ssl_version,
         )
+        if self.http2 and hasattr(self.ssl_context, "set_alpn_protocols"):
+            self.ssl_context.set_alpn_protocols(HTTP2Connection.alpn_protocols)
         self.assert_hostname = assert_hostname or server_hostname
         self.assert_fingerprint = assert_fingerprint
 
@@ -839,7 +1391,7 @@ class HTTPSConnectionPool(HTTPConnectionPool):
         """
         Return a fresh connection.
         """
-        self.num_connections += 1
+        self.stats.increment("connections_created")
         log.debug(
             "Starting new HTTPS connection (%d): %s:%s",
             self.num_connections,
@@ -867,6 +1419,7 @@ class HTTPSConnectionPool(HTTPConnectionPool):
             tunnel_headers=tunnel_headers,
             **self.conn_kw
         )
+        conn.stats = self.stats
 
         return conn
 
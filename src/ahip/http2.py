@@ -0,0 +1,639 @@
+# -*- coding: utf-8 -*-
+"""
+This module implements HTTP/2 connections, on top of the h2 library, which has
+to be installed for them to be used.
+
+An HTTP/2 connection can carry many requests at the same time, each on a
+stream of its own. There is no background task reading from the socket:
+whichever request is waiting for data reads it, and hands whatever belongs to
+the other streams over to them.
+"""
+from __future__ import absolute_import
+
+import collections
+import socket
+import threading
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.errors
+    import h2.events
+    import h2.exceptions
+    import h2.settings
+except ImportError:  # Platform-specific: h2 isn't installed
+    h2 = None
+
+from .base import Response
+from .connection import (
+    HTTP1Connection,
+    _BufferedBody,
+    _headers_to_native_string,
+    _make_body_iterable,
+    _stringify_headers,
+)
+from .exceptions import ProtocolError
+
+# Headers that are only about the HTTP/1.1 connection, and so not allowed in
+# HTTP/2.
+_CONNECTION_HEADERS = frozenset(
+    [
+        b"connection",
+        b"host",
+        b"keep-alive",
+        b"proxy-connection",
+        b"transfer-encoding",
+        b"upgrade",
+    ]
+)
+
+#: Whether HTTP/2 can be used, which requires the h2 package.
+HAS_H2 = h2 is not None
+
+# The flow control window that HTTP/2 starts off with.
+_DEFAULT_WINDOW_SIZE = 65535
+
+
+def _h2_request_headers(request, scheme):
+    """
+    Return the headers to send for ``request``, pseudo-headers first.
+    """
+    headers = list(
+        _stringify_headers(
+            [
+                (":method", request.method),
+                (":scheme", scheme),
+                (":authority", request.headers.get("host", "")),
+                (":path", request.target),
+            ]
+        )
+    )
+    for name, value in _stringify_headers(request.headers.items()):
+        name = name.lower()
+        if name in _CONNECTION_HEADERS:
+            continue
+        if name == b"te" and value.lower() != b"trailers":
+            continue
+        headers.append((name, value))
+    return headers
+
+
+class _StreamState(object):
+    """
+    What an :class:`_HTTP2Session` knows of one of its streams: the events
+    received on it that haven't been dealt with yet, and the error that ended
+    it, if any.
+    """
+
+    def __init__(self):
+        self.events = collections.deque()
+        self.ended = False
+        self.error = None
+
+
+class _HTTP2Session(object):
+    """
+    The HTTP/2 state of one socket, shared by all of its streams.
+
+    The state of h2 is only touched with ``_state_lock`` held, which is never
+    held while waiting on the network. The socket is read with ``_read_lock``
+    held and written to with ``_write_lock`` held, so that one request can be
+    sending while another one is receiving.
+    """
+
+    def __init__(self, connection, sock, scheme):
+        self._connection = connection
+        self._sock = sock
+        self._scheme = scheme
+        self._state_lock = threading.Lock()
+        self._read_lock = connection._backend.create_lock()
+        self._write_lock = connection._backend.create_lock()
+        self.streams = {}
+        #: Why no more streams can be opened, once the server is going away
+        #: or the connection broke.
+        self.closed_reason = None
+        # Whether nothing more can be read from the socket.
+        self._broken = False
+
+        config = h2.config.H2Configuration(client_side=True, header_encoding=None)
+        self._h2 = h2.connection.H2Connection(config=config)
+        self._h2.local_settings = h2.settings.Settings(
+            client=True,
+            initial_values={
+                h2.settings.SettingCodes.ENABLE_PUSH: 0,
+                h2.settings.SettingCodes.INITIAL_WINDOW_SIZE: (
+                    connection.stream_window_size
+                ),
+            },
+        )
+        self._h2.initiate_connection()
+        if connection.connection_window_size > _DEFAULT_WINDOW_SIZE:
+            self._h2.increment_flow_control_window(
+                connection.connection_window_size - _DEFAULT_WINDOW_SIZE
+            )
+
+    def fail(self, error):
+        """
+        Fail all streams that haven't ended yet with ``error``, and don't open
+        any more.
+        """
+        with self._state_lock:
+            self._broken = True
+            if self.closed_reason is None:
+                self.closed_reason = error
+            for state in self.streams.values():
+                if not state.ended and state.error is None:
+                    state.error = error
+
+    async def flush(self):
+        """
+        Send whatever h2 has queued up to send.
+        """
+        async with self._write_lock:
+            with self._state_lock:
+                data = self._h2.data_to_send()
+            if not data or self._broken:
+                return
+            stats = self._connection.stats
+            if stats is not None:
+                stats.increment("sent_bytes", len(data))
+            try:
+                await self._sock.send_all(data)
+            except socket.error as e:
+                self.fail(ProtocolError("Connection broken: %r" % e, e))
+                raise
+
+    async def wait_for(self, predicate, read_timeout):
+        """
+        Read from the socket on behalf of all streams until ``predicate()`` is
+        true, or the connection broke.
+        """
+        while not predicate() and not self._broken:
+            async with self._read_lock:
+                # Whoever was reading before may have read what we're
+                # waiting for.
+                if predicate() or self._broken:
+                    break
+                try:
+                    data = await self._sock.receive_some(read_timeout)
+                except socket.timeout:
+                    raise
+                except socket.error as e:
+                    self.fail(ProtocolError("Connection broken: %r" % e, e))
+                    continue
+                stats = self._connection.stats
+                if stats is not None:
+                    stats.increment("received_bytes", len(data))
+                self._receive_data(data)
+            await self.flush()
+
+    def _receive_data(self, data):
+        if not data:
+            self.fail(ProtocolError("Connection closed by the server"))
+            return
+
+        with self._state_lock:
+            try:
+                events = self._h2.receive_data(data)
+            except h2.exceptions.ProtocolError as e:
+                error = ProtocolError("Invalid HTTP/2 data: %r" % e, e)
+            else:
+                error = None
+                for event in events:
+                    self._dispatch(event)
+        if error is not None:
+            self.fail(error)
+
+    def _dispatch(self, event):
+        if isinstance(event, h2.events.ConnectionTerminated):
+            error = ProtocolError(
+                "Server closed the connection (error code %r)" % (event.error_code,)
+            )
+            if self.closed_reason is None:
+                self.closed_reason = error
+            # The streams up to last_stream_id are still completed.
+            for stream_id, state in self.streams.items():
+                if stream_id > (event.last_stream_id or 0) and not state.ended:
+                    state.error = error
+            return
+
+        stream_id = getattr(event, "stream_id", None)
+        if not stream_id:
+            return
+        state = self.streams.get(stream_id)
+        if state is None:
+            if isinstance(event, h2.events.DataReceived):
+                # Nobody is going to read it, but it still counts against
+                # the window of the connection.
+                self._h2.acknowledge_received_data(
+                    event.flow_controlled_length, stream_id
+                )
+            return
+
+        if isinstance(event, h2.events.StreamReset):
+            if not state.ended:
+                state.error = ProtocolError(
+                    "Stream reset by the server (error code %r)" % (event.error_code,)
+                )
+        elif isinstance(event, h2.events.StreamEnded):
+            state.ended = True
+            state.events.append(event)
+        elif isinstance(
+            event,
+            (
+                h2.events.ResponseReceived,
+                h2.events.InformationalResponseReceived,
+                h2.events.DataReceived,
+                h2.events.TrailersReceived,
+            ),
+        ):
+            state.events.append(event)
+
+    def _can_open_stream(self):
+        if self.closed_reason is not None:
+            return True
+        limit = min(
+            self._connection.max_concurrent_streams,
+            self._h2.remote_settings.max_concurrent_streams,
+        )
+        return self._h2.open_outbound_streams < limit
+
+    async def start_stream(self, request, read_timeout):
+        """
+        Open a stream and send the headers of ``request`` on it, waiting for
+        one of the open streams to end first if there are too many of them.
+        """
+        headers = _h2_request_headers(request, self._scheme)
+        while True:
+            await self.wait_for(self._can_open_stream, read_timeout)
+            with self._state_lock:
+                if self.closed_reason is not None:
+                    raise self.closed_reason
+                if self._can_open_stream():
+                    stream_id = self._h2.get_next_available_stream_id()
+                    state = _StreamState()
+                    self.streams[stream_id] = state
+                    self._h2.send_headers(
+                        stream_id, headers, end_stream=request.body is None
+                    )
+                    break
+        await self.flush()
+        return stream_id, state
+
+    async def send_body(self, stream_id, state, body, read_timeout):
+        """
+        Send ``body`` on the stream, as fast as its flow control window lets
+        us, and end it.
+        """
+
+        def can_send():
+            if state.ended or state.error is not None:
+                return True
+            return self._h2.local_flow_control_window(stream_id) > 0
+
+        async for chunk in _make_body_iterable(body):
+            while chunk:
+                await self.wait_for(can_send, read_timeout)
+                if state.error is not None:
+                    raise state.error
+                if state.ended:
+                    # The server already responded, and so it isn't
+                    # interested in the rest.
+                    self.cancel_stream(stream_id)
+                    return
+                with self._state_lock:
+                    size = min(
+                        len(chunk),
+                        self._h2.local_flow_control_window(stream_id),
+                        self._h2.max_outbound_frame_size,
+                    )
+                    self._h2.send_data(stream_id, chunk[:size])
+                chunk = chunk[size:]
+                await self.flush()
+
+        with self._state_lock:
+            self._h2.end_stream(stream_id)
+        await self.flush()
+
+    async def next_event(self, state, read_timeout):
+        """
+        Return the next event received on the stream.
+        """
+        await self.wait_for(
+            lambda: state.events or state.error is not None, read_timeout
+        )
+        if state.events:
+            return state.events.popleft()
+        raise state.error
+
+    async def receive_response(self, stream_id, state, read_timeout):
+        """
+        Wait for the response headers on the stream, and return them.
+        """
+        while True:
+            event = await self.next_event(state, read_timeout)
+            if isinstance(event, h2.events.ResponseReceived):
+                return event.headers
+            elif not isinstance(event, h2.events.InformationalResponseReceived):
+                raise ProtocolError("Expected response headers, got %r" % (event,))
+
+    async def receive_data(self, stream_id, state, read_timeout):
+        """
+        Return the next chunk of the response body on the stream, or ``None``
+        once it ended.
+        """
+        while True:
+            event = await self.next_event(state, read_timeout)
+            if isinstance(event, h2.events.DataReceived):
+                with self._state_lock:
+                    self._h2.acknowledge_received_data(
+                        event.flow_controlled_length, stream_id
+                    )
+                await self.flush()
+                if event.data:
+                    return bytes(event.data)
+            elif isinstance(event, h2.events.StreamEnded):
+                with self._state_lock:
+                    self._forget_stream(stream_id)
+                return None
+
+    def cancel_stream(self, stream_id):
+        """
+        Forget about the stream, and tell the server to stop sending on it the
+        next time something is sent.
+        """
+        with self._state_lock:
+            state = self._forget_stream(stream_id)
+            if state is None:
+                return
+            for event in state.events:
+                if isinstance(event, h2.events.DataReceived):
+                    self._h2.acknowledge_received_data(
+                        event.flow_controlled_length, stream_id
+                    )
+            try:
+                self._h2.reset_stream(stream_id, h2.errors.ErrorCodes.CANCEL)
+            except h2.exceptions.ProtocolError:
+                # The stream was already closed.
+                pass
+
+    def _forget_stream(self, stream_id):
+        # Called with _state_lock held. Once the server is going away, the
+        # connection is no use after its last stream, and the pool may not
+        # be holding on to it anymore to close it.
+        state = self.streams.pop(stream_id, None)
+        if state is not None and self.closed_reason is not None and not self.streams:
+            self._broken = True
+            self._sock.forceful_close()
+        return state
+
+    async def poll(self):
+        """
+        Deal with whatever the server sent while no stream was reading, such as
+        a ping, or it going away.
+        """
+        if self.streams or self.closed_reason is not None:
+            return
+        if self._sock.is_readable():
+            await self.wait_for(
+                lambda: self.closed_reason is not None or not self._sock.is_readable(),
+                None,
+            )
+
+
+class HTTP2Stream(object):
+    """
+    The body of a response that is read off a stream of an HTTP/2 connection.
+    It has the same interface as :class:`HTTP1Connection` has for the
+    response it is reading, except that closing it only resets the stream.
+    """
+
+    def __init__(self, session, stream_id, state, read_timeout):
+        self._session = session
+        self._stream_id = stream_id
+        self._state = state
+        self.read_timeout = read_timeout
+        self.complete = False
+
+    def __aiter__(self):
+        return self
+
+    def next(self):  # Platform-specific: Python 2.7
+        return self.__next__()
+
+    async def __anext__(self):
+        if self.complete:
+            raise StopAsyncIteration
+        data = await self._session.receive_data(
+            self._stream_id, self._state, self.read_timeout
+        )
+        if data is None:
+            self.complete = True
+            raise StopAsyncIteration
+        return data
+
+    def close(self):
+        if not self.complete:
+            self._session.cancel_stream(self._stream_id)
+            self.complete = True
+
+
+class HTTP2Connection(HTTP1Connection):
+    """
+    A connection that speaks HTTP/2 if the server does, and is the same as an
+    :class:`HTTP1Connection` otherwise.
+
+    With TLS, HTTP/2 is negotiated with ALPN, for which the SSL context has to
+    offer :attr:`alpn_protocols`. Without TLS, HTTP/2 is used with prior
+    knowledge (h2c), so the server has to be known to support it.
+
+    Once HTTP/2 is in use, the connection is :attr:`multiplexed`:
+    :meth:`send_request` can be called for many requests at the same time,
+    and each of them is sent on a stream of its own.
+    """
+
+    #: The protocols to offer with ALPN, in order of preference.
+    alpn_protocols = ["h2", "http/1.1"]
+
+    #: The flow control window of each stream, in bytes. This is how much of
+    #: a response the server can send before it has to wait for it to be read.
+    stream_window_size = 2 ** 24
+
+    #: The flow control window of the whole connection, in bytes, which all
+    #: of its streams share.
+    connection_window_size = 2 ** 26
+
+    #: The most streams that are open at once, even if the server allows more.
+    max_concurrent_streams = 100
+
+    def __init__(
+        self,
+        host,
+        port,
+        stream_window_size=None,
+        connection_window_size=None,
+        max_concurrent_streams=None,
+        **kwargs
+    ):
+        if not HAS_H2:
+            raise ImportError("HTTP/2 support requires the h2 package")
+        super(HTTP2Connection, self).__init__(host, port, **kwargs)
+        if stream_window_size is not None:
+            self.stream_window_size = stream_window_size
+        if connection_window_size is not None:
+            self.connection_window_size = connection_window_size
+        if max_concurrent_streams is not None:
+            self.max_concurrent_streams = max_concurrent_streams
+        self._session = None
+
+    @property
+    def multiplexed(self):
+        """
+        Whether HTTP/2 was negotiated the last time the connection was
+        connected. This stays true after :meth:`close`, until it's connected
+        again.
+        """
+        return self._session is not None
+
+    @property
+    def active_streams(self):
+        """
+        How many streams are open, if the connection is multiplexed.
+        """
+        return len(self._session.streams) if self._session is not None else 0
+
+    @property
+    def is_dropped(self):
+        """
+        Whether the multiplexed connection can't take any more requests.
+        """
+        return self._session is None or self._session.closed_reason is not None
+
+    async def connect(
+        self,
+        ssl_context=None,
+        fingerprint=None,
+        assert_hostname=None,
+        connect_timeout=None,
+    ):
+        if self._sock is not None:
+            return await super(HTTP2Connection, self).connect(
+                ssl_context, fingerprint, assert_hostname, connect_timeout
+            )
+
+        self._session = None
+        await super(HTTP2Connection, self).connect(
+            ssl_context, fingerprint, assert_hostname, connect_timeout
+        )
+        if ssl_context is None:
+            scheme = "http"
+        elif self._sock.selected_alpn_protocol() == "h2":
+            scheme = "https"
+        else:
+            return
+
+        self._session = _HTTP2Session(self, self._sock, scheme)
+        await self._session.flush()
+
+    async def poll(self):
+        """
+        Deal with whatever the server sent on the multiplexed connection while
+        it was idle, so that :attr:`is_dropped` is up to date.
+        """
+        if self._session is not None:
+            await self._session.poll()
+
+    async def send_request(self, request, read_timeout):
+        if self._session is None:
+            return await super(HTTP2Connection, self).send_request(
+                request, read_timeout
+            )
+
+        session = self._session
+        stream_id, state = await session.start_stream(request, read_timeout)
+        try:
+            if request.body is not None:
+                await session.send_body(stream_id, state, request.body, read_timeout)
+            headers = await session.receive_response(stream_id, state, read_timeout)
+        except BaseException:
+            session.cancel_stream(stream_id)
+            raise
+
+        return _response_from_h2(
+            headers, HTTP2Stream(session, stream_id, state, read_timeout)
+        )
+
+    async def send_pipelined_requests(self, requests, read_timeout):
+        """
+        Same as :meth:`HTTP1Connection.send_pipelined_requests`. Once the
+        connection is multiplexed, each request is sent on a stream of its
+        own, and so the responses can come back in any order.
+        """
+        if self._session is None:
+            return await super(HTTP2Connection, self).send_pipelined_requests(
+                requests, read_timeout
+            )
+
+        session = self._session
+        streams = []
+        responses = []
+        try:
+            for request in requests:
+                streams.append(await session.start_stream(request, read_timeout))
+            for stream_id, state in streams:
+                try:
+                    headers = await session.receive_response(
+                        stream_id, state, read_timeout
+                    )
+                    chunks = []
+                    while True:
+                        chunk = await session.receive_data(
+                            stream_id, state, read_timeout
+                        )
+                        if chunk is None:
+                            break
+                        chunks.append(chunk)
+                except ProtocolError:
+                    if not responses:
+                        raise
+                    # The rest can be sent again.
+                    break
+                responses.append(_response_from_h2(headers, _BufferedBody(chunks)))
+        finally:
+            for stream_id, _ in streams[len(responses) :]:
+                session.cancel_stream(stream_id)
+        return responses
+
+    def close(self):
+        if self._session is not None:
+            self._session.fail(ProtocolError("Connection closed"))
+        super(HTTP2Connection, self).close()
+
+    @property
+    def complete(self):
+        if self._session is not None:
+            return True
+        return super(HTTP2Connection, self).complete
+
+
+def _response_from_h2(headers, body_object):
+    """
+    Given the headers of an HTTP/2 response, build a Hip response object and
+    return it.
+    """
+    status_code = None
+    regular_headers = []
+    for name, value in headers:
+        if name == b":status":
+            status_code = int(value)
+        elif not name.startswith(b":"):
+            regular_headers.append((name, value))
+    if status_code is None:
+        raise ProtocolError("Response has no :status")
+
+    return Response(
+        status_code=status_code,
+        headers=_headers_to_native_string(regular_headers),
+        body=body_object,
+        version=b"HTTP/2",
+    )
@@ -2,15 +2,23 @@ from __future__ import absolute_import
 import collections
 import functools
 import logging
+import socket
+import threading
 
 from ._collections import RecentlyUsedContainer
 from .base import DEFAULT_PORTS
 from .connectionpool import HTTPConnectionPool, HTTPSConnectionPool
-from .exceptions import LocationValueError, MaxRetryError, ProxySchemeUnknown
+from .exceptions import (
+    HTTPError,
+    LocationValueError,
+    MaxRetryError,
+    ProxySchemeUnknown,
+)
 from .packages import six
 from .packages.six.moves.urllib.parse import urljoin
 from .request import RequestMethods
-from .util.url import parse_url
+from .util.metrics import merge_snapshots, render_openmetrics
+from .util.url import parse_url, Url
 from .util.request import set_file_position
 from .util.retry import Retry
 
@@ -50,6 +58,11 @@ _key_fields = (
     "key_ca_cert_dir",  # str
     "key_ssl_context",  # instance of ssl.SSLContext or hip.util.ssl_.SSLContext
     "key_maxsize",  # int
+    "key_max_idle_time",  # int or float
+    "key_max_idle_connections",  # int
+    "key_min_idle",  # int
+    "key_checkout_order",  # str
+    "key_http2",  # bool
     "key_headers",  # dict
     "key__proxy",  # parsed proxy url
     "key__proxy_headers",  # dict
@@ -156,10 +169,16 @@ class PoolManager(RequestMethods):
 
     proxy = None
 
+    #: How many origins the stats of closed pools (see :meth:`stats_by_origin`)
+    #: and :meth:`seen_origins` are kept for. Beyond that, the least recently
+    #: used ones are forgotten, so that a manager that talks to very many
+    #: hosts doesn't grow without bounds.
+    max_retired_origins = 1000
+
     def __init__(self, num_pools=10, headers=None, backend=None, **connection_pool_kw):
         RequestMethods.__init__(self, headers)
         self.connection_pool_kw = connection_pool_kw
-        self.pools = RecentlyUsedContainer(num_pools, dispose_func=lambda p: p.close())
+        self.pools = RecentlyUsedContainer(num_pools, dispose_func=self._dispose_pool)
 
         # Locally set the pool classes and keys so other PoolManagers can
         # override them.
@@ -167,6 +186,22 @@ class PoolManager(RequestMethods):
         self.key_fn_by_scheme = key_fn_by_scheme.copy()
         self.backend = backend
 
+        # The origins we've created a pool for, least recent first, see
+        # seen_origins().
+        self._seen_origins = collections.OrderedDict()
+        self._seen_origins_lock = threading.Lock()
+
+        # The pools whose stats are still live, and the stats of the ones that
+        # were closed, by origin, so that the counters don't go backwards when
+        # pools are evicted. A pool moves from one to the other under the
+        # lock, so that it is always accounted for exactly once.
+        self._stats_lock = threading.Lock()
+        self._live_pools = {}
+        self._retired_stats = collections.OrderedDict()
+        # The retired stats of the least recently retired origins beyond
+        # max_retired_origins, added up.
+        self._overflow_stats = None
+
     def __enter__(self):
         return self
 
@@ -202,6 +237,67 @@ class PoolManager(RequestMethods):
 
         return pool_cls(host, port, backend=self.backend, **request_context)
 
+    def _dispose_pool(self, pool):
+        pool.close()
+        origin = (pool.scheme, pool.host, pool.port)
+        with self._stats_lock:
+            if self._live_pools.pop(id(pool), None) is None:
+                return
+            snapshots = [pool.stats.snapshot()]
+            previous = self._retired_stats.pop(origin, None)
+            if previous is not None:
+                snapshots.append(previous)
+            self._retired_stats[origin] = merge_snapshots(snapshots)
+
+            while len(self._retired_stats) > self.max_retired_origins:
+                _, snapshot = self._retired_stats.popitem(last=False)
+                if self._overflow_stats is not None:
+                    snapshot = merge_snapshots([snapshot, self._overflow_stats])
+                self._overflow_stats = snapshot
+
+    def stats_by_origin(self):
+        """
+        Return snapshots of the :class:`hip.util.metrics.PoolStats` of this
+        manager's pools, added up by origin, as a dict mapping
+        ``(scheme, host, port)`` tuples to snapshots. Pools that were closed
+        are still accounted for, for the last :attr:`max_retired_origins`
+        origins.
+        """
+        with self._stats_lock:
+            by_origin = dict(
+                (origin, [snapshot]) for origin, snapshot in self._retired_stats.items()
+            )
+            for pool in self._live_pools.values():
+                origin = (pool.scheme, pool.host, pool.port)
+                by_origin.setdefault(origin, []).append(pool.stats.snapshot())
+        return dict(
+            (origin, merge_snapshots(snapshots))
+            for origin, snapshots in by_origin.items()
+        )
+
+    def stats_snapshot(self):
+        """
+        Return a snapshot of the :class:`hip.util.metrics.PoolStats` of all
+        the pools of this manager, added up.
+        """
+        snapshots = list(self.stats_by_origin().values())
+        with self._stats_lock:
+            if self._overflow_stats is not None:
+                snapshots.append(self._overflow_stats)
+        return merge_snapshots(snapshots)
+
+    def render_metrics(self):
+        """
+        Return the stats of this manager's pools in the OpenMetrics text
+        format, labelled with their scheme, host and port.
+        """
+        return render_openmetrics(
+            ([("scheme", scheme), ("host", host), ("port", port)], snapshot)
+            for (scheme, host, port), snapshot in sorted(
+                self.stats_by_origin().items(), key=lambda item: str(item[0])
+            )
+        )
+
     def clear(self):
         """
         Empty our store of pools and direct them all to close.
@@ -267,10 +363,50 @@ class PoolManager(RequestMethods):
             host = request_context["host"]
             port = request_context["port"]
             pool = self._new_pool(scheme, host, port, request_context=request_context)
+            with self._stats_lock:
+                self._live_pools[id(pool)] = pool
             self.pools[pool_key] = pool
 
+        origin = (scheme.lower(), host.lower(), port)
+        with self._seen_origins_lock:
+            self._seen_origins.pop(origin, None)
+            self._seen_origins[origin] = None
+            while len(self._seen_origins) > self.max_retired_origins:
+                self._seen_origins.popitem(last=False)
+
         return pool
 
+    def seen_origins(self):
+        """
+        Return the URLs of all the origins (``scheme://host:port``) this
+        manager has created a connection pool for, sorted.
+
+        These can be saved and passed to :meth:`warm` the next time the
+        process starts.
+        """
+        with self._seen_origins_lock:
+            origins = list(self._seen_origins)
+        return sorted(
+            Url(scheme=scheme, host=host, port=port).url
+            for scheme, host, port in origins
+        )
+
+    async def warm(self, urls, connections_per_host=1):
+        """
+        Open ``connections_per_host`` connections to the origin of each of
+        ``urls`` ahead of time, including the TLS handshakes. See
+        :meth:`hip.connectionpool.HTTPConnectionPool.prefill`.
+
+        Warming up is best effort: origins that can't be connected to are
+        logged and skipped.
+        """
+        for url in urls:
+            pool = self.connection_from_url(url)
+            try:
+                await pool.prefill(connections_per_host)
+            except (HTTPError, socket.error) as e:
+                log.warning("Failed to warm up connections to %s: %r", url, e)
+
     def connection_from_url(self, url, pool_kwargs=None):
         """
         Similar to :func:`hip.connectionpool.connection_from_url`.
@@ -316,9 +452,6 @@ class PoolManager(RequestMethods):
         The given ``url`` parameter must be absolute, such that an appropriate
         :class:`hip.connectionpool.ConnectionPool` can be chosen for it.
         """
-        u = parse_url(url)
-        conn = self.connection_from_host(u.host, port=u.port, scheme=u.scheme)
-
         # Rewind body position, if needed. Record current position
         # for future rewinds in the event of a redirect/retry.
         body = kw.get("body")
@@ -328,50 +461,59 @@ class PoolManager(RequestMethods):
         if "headers" not in kw:
             kw["headers"] = self.headers.copy()
 
-        if self.proxy is not None and u.scheme == "http":
-            response = await conn.urlopen(method, url, **kw)
-        else:
-            response = await conn.urlopen(method, u.request_uri, **kw)
-
-        redirect_location = redirect and response.get_redirect_location()
-        if not redirect_location:
-            return response
-
-        # Support relative URLs for redirecting.
-        redirect_location = urljoin(url, redirect_location)
-
-        # RFC 7231, Section 6.4.4
-        if response.status == 303:
-            method = "GET"
-
-        retries = kw.get("retries")
-        if not isinstance(retries, Retry):
-            retries = Retry.from_int(retries, redirect=redirect)
-
-        # Strip headers marked as unsafe to forward to the redirected location.
-        # Check remove_headers_on_redirect to avoid a potential network call within
-        # conn.is_same_host() which may use socket.gethostbyname() in the future.
-        if retries.remove_headers_on_redirect and not conn.is_same_host(
-            redirect_location
-        ):
-            headers = list(six.iterkeys(kw["headers"]))
-            for header in headers:
-                if header.lower() in retries.remove_headers_on_redirect:
-                    kw["headers"].pop(header, None)
-
-        try:
-            retries = retries.increment(method, url, response=response, _pool=conn)
-        except MaxRetryError:
-            if retries.raise_on_redirect:
-                raise
-            return response
-
-        kw["retries"] = retries
-        kw["redirect"] = redirect
-
-        retries.sleep_for_retry(response)
-        log.info("Redirecting %s -> %s", url, redirect_location)
-        return await self.urlopen(method, redirect_location, **kw)
+        # Follow redirects in a loop rather than recursively, so that long
+        # redirect chains don't grow the stack.
+        while True:
+            u = parse_url(url)
+            conn = self.connection_from_host(u.host, port=u.port, scheme=u.scheme)
+
+            if self.proxy is not None and u.scheme == "http":
+                response = await conn.urlopen(method, url, **kw)
+            else:
+                response = await conn.urlopen(method, u.request_uri, **kw)
+
+            redirect_location = redirect and response.get_redirect_location()
+            if not redirect_location:
+                return response
+
+            # Support relative URLs for redirecting.
+            redirect_location = urljoin(url, redirect_location)
+
+            # RFC 7231, Section 6.4.4
+            if response.status == 303:
+                method = "GET"
+
+            retries = kw.get("retries")
+            if not isinstance(retries, Retry):
+                retries = Retry.from_int(retries, redirect=redirect)
+
+            # Strip headers marked as unsafe to forward to the redirected
+            # location. Check remove_headers_on_redirect to avoid a potential
+            # network call within conn.is_same_host() which may use
+            # socket.gethostbyname() in the future.
+            if retries.remove_headers_on_redirect and not conn.is_same_host(
+                redirect_location
+            ):
+                headers = list(six.iterkeys(kw["headers"]))
+                for header in headers:
+                    if header.lower() in retries.remove_headers_on_redirect:
+                        kw["headers"].pop(header, None)
+
+            try:
+                retries = retries.increment(method, url, response=response, _pool=conn)
+            except MaxRetryError:
+                if retries.raise_on_redirect:
+                    raise
+                return response
+
+            kw["retries"] = retries
+
+            retries.sleep_for_retry(response)
+            log.info("Redirecting %s -> %s", url, redirect_location)
+            url = redirect_location
+
+            # Rewind the body for the redirected request.
+            kw["body_pos"] = await set_file_position(body, kw["body_pos"])
 
 
 class ProxyManager(PoolManager):
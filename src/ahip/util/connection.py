@@ -6,6 +6,11 @@ def is_connection_dropped(conn):  # Platform-specific
     """
     Returns True if the connection is dropped and should be closed.
     """
+    if getattr(conn, "multiplexed", False):
+        # The socket is read on behalf of all streams, so it being readable
+        # means nothing, and the connection keeps track itself.
+        return conn.is_dropped
+
     sock = getattr(conn, "_sock", False)
 
     if sock is None:  # Connection already closed (such as by httplib).
@@ -0,0 +1,234 @@
+"""
+Counters and histograms describing how connection pools are used, and a
+renderer for the OpenMetrics text format.
+
+Together they tell apart time spent waiting on the pool (checkout waits and
+misses) from time spent talking to the upstream (connects, TLS handshakes and
+bytes transferred).
+"""
+from __future__ import absolute_import
+
+import bisect
+import collections
+import threading
+
+#: The counters kept by :class:`PoolStats`, with their descriptions.
+COUNTERS = collections.OrderedDict(
+    [
+        ("requests", "Requests sent"),
+        ("checkout_hits", "Checkouts that reused an idle connection"),
+        ("checkout_misses", "Checkouts that had to open a new connection"),
+        ("connections_created", "Connections created"),
+        (
+            "connections_dropped",
+            "Idle connections found dropped or expired at checkout",
+        ),
+        ("connections_discarded", "Connections discarded because the pool was full",),
+        ("retries", "Requests retried"),
+        ("sent_bytes", "Bytes sent, including headers"),
+        ("received_bytes", "Bytes received, including headers"),
+    ]
+)
+
+#: The histograms kept by :class:`PoolStats`, with their descriptions.
+HISTOGRAMS = collections.OrderedDict(
+    [
+        ("checkout_wait_seconds", "Time spent getting a connection from the pool"),
+        ("connect_seconds", "Time spent opening TCP connections"),
+        ("tls_handshake_seconds", "Time spent in TLS handshakes"),
+    ]
+)
+
+#: Upper bounds of the histogram buckets, in seconds.
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+INF = float("inf")
+
+#: A histogram in a snapshot. ``buckets`` is a tuple of ``(upper_bound,
+#: count)`` pairs, where each count includes the observations of the buckets
+#: before it, and the last upper bound is infinity.
+HistogramSnapshot = collections.namedtuple(
+    "HistogramSnapshot", ["buckets", "sum", "count"]
+)
+
+
+class PoolStats(object):
+    """
+    Thread-safe counters and histograms for a connection pool.
+
+    The names of the counters and histograms are the keys of :data:`COUNTERS`
+    and :data:`HISTOGRAMS`.
+
+    :param buckets:
+        Upper bounds of the histogram buckets, in seconds, in increasing
+        order.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        # Per histogram: a count per bucket (plus one for +Inf), and the sum.
+        self._histograms = dict(
+            (name, [[0] * (len(self.buckets) + 1), 0.0]) for name in HISTOGRAMS
+        )
+
+    def __getitem__(self, name):
+        return self._counters[name]
+
+    def increment(self, name, value=1):
+        """
+        Add ``value`` to the counter ``name``.
+        """
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name, value):
+        """
+        Record ``value`` in the histogram ``name``.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms[name]
+            histogram[0][index] += 1
+            histogram[1] += value
+
+    def snapshot(self):
+        """
+        Return a consistent copy of the current values, as a dict mapping the
+        counter names to ints and the histogram names to
+        :class:`HistogramSnapshot` instances.
+        """
+        with self._lock:
+            snapshot = dict(self._counters)
+            histograms = [
+                (name, list(counts), total)
+                for name, (counts, total) in self._histograms.items()
+            ]
+
+        bounds = self.buckets + (INF,)
+        for name, counts, total in histograms:
+            cumulative = []
+            count = 0
+            for bound, bucket_count in zip(bounds, counts):
+                count += bucket_count
+                cumulative.append((bound, count))
+            snapshot[name] = HistogramSnapshot(tuple(cumulative), total, count)
+        return snapshot
+
+
+def merge_snapshots(snapshots):
+    """
+    Add up several snapshots returned by :meth:`PoolStats.snapshot`, for
+    example those of all the pools of a
+    :class:`~hip.poolmanager.PoolManager`. Their histograms must have the same
+    buckets.
+    """
+    merged = PoolStats().snapshot()
+    for snapshot in snapshots:
+        for name in COUNTERS:
+            merged[name] += snapshot[name]
+        for name in HISTOGRAMS:
+            ours, theirs = merged[name], snapshot[name]
+            if ours.count == 0:
+                merged[name] = theirs
+                continue
+            if [bound for bound, _ in ours.buckets] != [
+                bound for bound, _ in theirs.buckets
+            ]:
+                raise ValueError("Can't merge histograms with different buckets")
+            merged[name] = HistogramSnapshot(
+                tuple(
+                    (bound, count + other)
+                    for (bound, count), (_, other) in zip(ours.buckets, theirs.buckets)
+                ),
+                ours.sum + theirs.sum,
+                ours.count + theirs.count,
+            )
+    return merged
+
+
+def _format_value(value):
+    if value == INF:
+        return "+Inf"
+    return repr(value)
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{%s}" % ",".join(
+        '%s="%s"'
+        % (
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in pairs
+    )
+
+
+def render_openmetrics(samples, prefix="hip_pool"):
+    """
+    Render snapshots in the OpenMetrics text exposition format.
+
+    :param samples:
+        An iterable of ``(labels, snapshot)`` pairs, where ``labels`` is a
+        sequence of ``(name, value)`` pairs telling the snapshots apart, and
+        ``snapshot`` is returned by :meth:`PoolStats.snapshot`.
+
+    :param prefix:
+        Prepended to the name of every metric.
+    """
+    samples = list(samples)
+    lines = []
+
+    for name, description in COUNTERS.items():
+        metric = "%s_%s" % (prefix, name)
+        lines.append("# TYPE %s counter" % metric)
+        lines.append("# HELP %s %s." % (metric, description))
+        for labels, snapshot in samples:
+            lines.append(
+                "%s_total%s %d" % (metric, _format_labels(labels), snapshot[name])
+            )
+
+    for name, description in HISTOGRAMS.items():
+        metric = "%s_%s" % (prefix, name)
+        lines.append("# TYPE %s histogram" % metric)
+        lines.append("# UNIT %s seconds" % metric)
+        lines.append("# HELP %s %s." % (metric, description))
+        for labels, snapshot in samples:
+            histogram = snapshot[name]
+            for bound, count in histogram.buckets:
+                lines.append(
+                    "%s_bucket%s %d"
+                    % (
+                        metric,
+                        _format_labels(labels, [("le", _format_value(bound))]),
+                        count,
+                    )
+                )
+            lines.append(
+                "%s_count%s %d" % (metric, _format_labels(labels), histogram.count)
+            )
+            lines.append(
+                "%s_sum%s %s"
+                % (metric, _format_labels(labels), _format_value(histogram.sum))
+            )
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
@@ -1,21 +1,333 @@
 import collections
+import heapq
+import itertools
+import threading
+
 from ..packages import six
 from ..packages.six.moves import queue
+from .timeout import current_time
 
 if six.PY2:
     # Queue is imported for side effects on MS Windows. See issue #229.
     import Queue as _unused_module_Queue  # noqa: F401
 
 
+def _evict(items, select):
+    live = [item for item in items if item is not None]
+    evicted = select(live)
+    if not evicted:
+        return []
+
+    evicted_ids = set(id(item) for item in evicted)
+    kept = [item for item in live if id(item) not in evicted_ids]
+    # Put the freed slots at the bottom of the stack, so that the remaining
+    # items are still handed out first.
+    size = len(items)
+    items.clear()
+    items.extend([None] * (size - len(kept)))
+    items.extend(kept)
+    return evicted
+
+
+def _fill_slot(items, item):
+    try:
+        items.remove(None)
+    except ValueError:
+        return False
+    items.append(item)
+    return True
+
+
+class _Waiter(object):
+    __slots__ = ("event", "item", "done", "cancelled")
+
+    def __init__(self, event):
+        self.event = event
+        self.item = None
+        self.done = False
+        self.cancelled = False
+
+
+class _Waiters(object):
+    """
+    The threads or tasks waiting on an empty queue, in the order they get
+    served: by ascending ``key``, then first come, first served.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def push(self, waiter, key):
+        heapq.heappush(self._heap, (key, next(self._counter), waiter))
+        self._len += 1
+
+    def pop(self):
+        while self._heap:
+            _, _, waiter = heapq.heappop(self._heap)
+            if not waiter.cancelled:
+                self._len -= 1
+                return waiter
+        return None
+
+    def remove(self, waiter):
+        waiter.cancelled = True
+        self._len -= 1
+        # Cancelled waiters are only dropped lazily, so don't let them pile up
+        # when waits time out and nothing is put in the queue.
+        if len(self._heap) > 2 * self._len + 16:
+            self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+            heapq.heapify(self._heap)
+
+
 class LifoQueue(queue.Queue):
+    """
+    A LIFO queue whose :meth:`get` serves waiting threads in a well-defined
+    order, see :meth:`get`.
+    """
+
     def _init(self, _):
         self.queue = collections.deque()
+        self._waiters = _Waiters()
 
     def _qsize(self, len=len):
         return len(self.queue)
 
     def _put(self, item):
-        self.queue.append(item)
+        waiter = self._waiters.pop()
+        if waiter is None:
+            self.queue.append(item)
+            return
+        waiter.item = item
+        waiter.done = True
+        waiter.event.notify()
 
     def _get(self):
         return self.queue.pop()
+
+    def get(self, block=True, timeout=None, key=0):
+        """
+        Remove and return the most recently put item.
+
+        If the queue is empty and ``block`` is true, wait up to ``timeout``
+        seconds (forever if ``None``) for another thread to put an item, then
+        raise :class:`queue.Empty`. Items are handed to the waiting threads
+        with the lowest ``key`` first, and in the order they started waiting
+        among equal keys.
+        """
+        with self.mutex:
+            if self.queue:
+                item = self._get()
+                self.not_full.notify()
+                return item
+
+            if not block:
+                raise queue.Empty
+            if timeout is not None:
+                if timeout < 0:
+                    raise ValueError("'timeout' must be a non-negative number")
+                end_time = current_time() + timeout
+
+            waiter = _Waiter(threading.Condition(self.mutex))
+            self._waiters.push(waiter, key)
+            try:
+                while not waiter.done:
+                    if timeout is None:
+                        waiter.event.wait()
+                        continue
+                    remaining = end_time - current_time()
+                    if remaining <= 0:
+                        self._waiters.remove(waiter)
+                        raise queue.Empty
+                    waiter.event.wait(remaining)
+            except BaseException:
+                if waiter.done:
+                    # Interrupted right after an item was handed to us, pass
+                    # it on so it doesn't leak out of the pool.
+                    self._put(waiter.item)
+                elif not waiter.cancelled:
+                    self._waiters.remove(waiter)
+                raise
+            return waiter.item
+
+    def evict(self, select):
+        """
+        Replace some of the queued items with ``None`` and return them.
+
+        ``select`` is called with the list of queued items that aren't
+        ``None``, from least to most recently put, and returns the ones to
+        evict. The queue is locked while ``select`` runs.
+        """
+        with self.mutex:
+            return _evict(self.queue, select)
+
+    def items(self):
+        """
+        Return a list of the queued items that aren't ``None``, from least to
+        most recently put.
+        """
+        with self.mutex:
+            return [item for item in self.queue if item is not None]
+
+    def filled_slots(self):
+        """
+        Return the number of queued items that aren't ``None``.
+        """
+        with self.mutex:
+            return len(self.queue) - self.queue.count(None)
+
+    def free_slots(self):
+        """
+        Return the number of queued ``None`` placeholders.
+        """
+        with self.mutex:
+            return self.queue.count(None)
+
+    def fill_slot(self, item):
+        """
+        Put ``item`` in place of one of the queued ``None`` placeholders, and
+        return whether there was one.
+        """
+        with self.mutex:
+            return _fill_slot(self.queue, item)
+
+
+class AsyncLifoQueue(object):
+    """
+    A LIFO queue for connection pools running in async mode.
+
+    :class:`queue.Queue` blocks the whole OS thread while it waits, which
+    would stall the event loop along with every other task on it. Instead,
+    tasks waiting on an empty queue are parked on an event from the running
+    backend, and :meth:`put` hands its item straight to the first one of them,
+    see :meth:`get`.
+
+    Only the parts of the :class:`queue.Queue` interface used by the pools are
+    provided, and :meth:`get` is a coroutine.
+
+    :param backend:
+        The backend to create the events with, given the same way as to the
+        pools. ``None`` picks the one for the running event loop.
+    """
+
+    def __init__(self, maxsize=0, backend=None):
+        self.maxsize = maxsize
+        self.queue = collections.deque()
+        self._waiters = _Waiters()
+        self._backend_spec = backend
+        self._backend = None
+
+    def _create_event(self):
+        if self._backend is None:
+            from .._backends._loader import load_backend, normalize_backend
+
+            self._backend = load_backend(
+                normalize_backend(self._backend_spec, async_mode=True)
+            )
+        return self._backend.create_event()
+
+    def qsize(self):
+        return len(self.queue)
+
+    def empty(self):
+        return not self.queue
+
+    def full(self):
+        return 0 < self.maxsize <= len(self.queue)
+
+    def put(self, item, block=True, timeout=None):
+        """
+        Put an item into the queue, or hand it to the first waiting task, see
+        :meth:`get`.
+
+        This never blocks: ``block`` and ``timeout`` are only accepted for
+        compatibility, and :class:`queue.Full` is raised if there is no room.
+        """
+        waiter = self._waiters.pop()
+        if waiter is not None:
+            waiter.item = item
+            waiter.done = True
+            waiter.event.set()
+            return
+
+        if self.full():
+            raise queue.Full
+        self.queue.append(item)
+
+    def put_nowait(self, item):
+        return self.put(item, block=False)
+
+    async def get(self, block=True, timeout=None, key=0):
+        """
+        Remove and return the most recently put item.
+
+        If the queue is empty and ``block`` is true, wait up to ``timeout``
+        seconds (forever if ``None``) for another task to put an item, then
+        raise :class:`queue.Empty`. Items are handed to the waiting tasks with
+        the lowest ``key`` first, and in the order they started waiting among
+        equal keys.
+        """
+        if self.queue:
+            return self.queue.pop()
+
+        if not block:
+            raise queue.Empty
+        if timeout is not None and timeout < 0:
+            raise ValueError("'timeout' must be a non-negative number")
+
+        waiter = _Waiter(self._create_event())
+        self._waiters.push(waiter, key)
+        try:
+            await waiter.event.wait(timeout)
+        except BaseException:
+            # We were cancelled. If an item was already handed to us, pass it
+            # on so it doesn't leak out of the pool.
+            if waiter.done:
+                self.put(waiter.item)
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+        if not waiter.done:
+            self._waiters.remove(waiter)
+            raise queue.Empty
+        return waiter.item
+
+    def get_nowait(self):
+        if not self.queue:
+            raise queue.Empty
+        return self.queue.pop()
+
+    def evict(self, select):
+        """
+        Same as :meth:`LifoQueue.evict`.
+        """
+        return _evict(self.queue, select)
+
+    def items(self):
+        """
+        Same as :meth:`LifoQueue.items`.
+        """
+        return [item for item in self.queue if item is not None]
+
+    def filled_slots(self):
+        """
+        Same as :meth:`LifoQueue.filled_slots`.
+        """
+        return len(self.queue) - self.queue.count(None)
+
+    def free_slots(self):
+        """
+        Same as :meth:`LifoQueue.free_slots`.
+        """
+        return self.queue.count(None)
+
+    def fill_slot(self, item):
+        """
+        Same as :meth:`LifoQueue.fill_slot`.
+        """
+        return _fill_slot(self.queue, item)
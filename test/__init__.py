@@ -13,6 +13,11 @@ try:
 except ImportError:
     brotli = None
 
+try:
+    import h2
+except ImportError:
+    h2 = None
+
 from hip.exceptions import HTTPWarning
 from hip.packages import six
 from hip.util import ssl_
@@ -128,6 +133,10 @@ def notBrotlipy():
     )
 
 
+def onlyH2():
+    return pytest.mark.skipif(h2 is None, reason="only run if h2 is present")
+
+
 def notSecureTransport(test):
     """Skips this test when SecureTransport is in use."""
 
@@ -0,0 +1,55 @@
+import asyncio
+
+import mock
+import pytest
+import trio
+
+from ahip import HTTPConnectionPool
+from ahip.exceptions import EmptyPoolError
+
+
+def test_pool_timeout_in_async_mode():
+    async def _test():
+        with HTTPConnectionPool(host="localhost", maxsize=1, block=True) as pool:
+            conn = await pool._get_conn()
+            with pytest.raises(EmptyPoolError):
+                await pool._get_conn(timeout=0.01)
+            pool._put_conn(conn)
+            assert await pool._get_conn(timeout=0.01) is conn
+
+    trio.run(_test)
+
+
+def test_idle_reaper_task():
+    async def _test(sleep):
+        with HTTPConnectionPool(host="localhost", max_idle_time=0.01) as pool:
+            conn = await pool._get_conn()
+            conn._sock = mock.Mock(is_readable=mock.Mock(return_value=False))
+            pool._put_conn(conn)
+            assert pool._reaper_running
+
+            for _ in range(500):
+                if conn._sock is None:
+                    break
+                await sleep(0.01)
+            assert conn._sock is None
+            assert list(pool.pool.queue) == [None]
+
+    trio.run(_test, trio.sleep)
+    asyncio.run(_test(asyncio.sleep))
+
+
+def test_pool_queue_uses_pool_backend():
+    async def _test():
+        with HTTPConnectionPool(
+            host="localhost", maxsize=1, block=True, backend="trio"
+        ) as pool:
+            conn = await pool._get_conn()
+            # The backend was given, so it must not be sniffed.
+            with mock.patch("sniffio.current_async_library", side_effect=KeyError):
+                with pytest.raises(EmptyPoolError):
+                    await pool._get_conn(timeout=0.01)
+            pool._put_conn(conn)
+            assert await pool._get_conn(timeout=0.01) is conn
+
+    trio.run(_test)
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+import trio
+import trio.testing
+
+from ahip.packages.six.moves import queue
+from ahip.util.queue import AsyncLifoQueue
+
+
+def test_get_does_not_block_event_loop():
+    async def _test():
+        q = AsyncLifoQueue(1)
+        results = []
+
+        async def getter():
+            results.append(await q.get(timeout=5))
+
+        async with trio.open_nursery() as nursery:
+            nursery.start_soon(getter)
+            await trio.testing.wait_all_tasks_blocked()
+            # The getter is parked, and the event loop keeps running.
+            assert results == []
+            q.put("conn")
+
+        assert results == ["conn"]
+        assert q.qsize() == 0
+
+    trio.run(_test)
+
+
+def test_put_hands_item_to_longest_waiter():
+    async def _test():
+        q = AsyncLifoQueue(2)
+        order = []
+
+        async def getter(name):
+            order.append((name, await q.get()))
+
+        async with trio.open_nursery() as nursery:
+            for name in ("first", "second"):
+                nursery.start_soon(getter, name)
+                await trio.testing.wait_all_tasks_blocked()
+            q.put("a")
+            q.put("b")
+
+        assert sorted(order) == [("first", "a"), ("second", "b")]
+
+    trio.run(_test)
+
+
+def test_get_timeout():
+    async def _test():
+        q = AsyncLifoQueue(1)
+        with pytest.raises(queue.Empty):
+            await q.get(timeout=0.01)
+        with pytest.raises(queue.Empty):
+            await q.get(block=False)
+        # A timed out waiter must not swallow later items.
+        q.put("conn")
+        assert await q.get(block=False) == "conn"
+
+    trio.run(_test)
+    asyncio.run(_test())
+
+
+def test_cancelled_waiter_is_forgotten():
+    async def _test():
+        q = AsyncLifoQueue(1)
+
+        async with trio.open_nursery() as nursery:
+            nursery.start_soon(q.get)
+            await trio.testing.wait_all_tasks_blocked()
+            nursery.cancel_scope.cancel()
+
+        # Nobody is waiting anymore, so the item has to stay in the queue.
+        q.put("conn")
+        assert q.get_nowait() == "conn"
+
+    trio.run(_test)
+
+
+def test_put_hands_item_to_lowest_key():
+    async def _test():
+        q = AsyncLifoQueue(1)
+        order = []
+
+        async def getter(key):
+            order.append((key, await q.get(key=key)))
+
+        async with trio.open_nursery() as nursery:
+            for key in (2, 1, 3):
+                nursery.start_soon(getter, key)
+                await trio.testing.wait_all_tasks_blocked()
+            for item in ("a", "b", "c"):
+                q.put(item)
+                await trio.testing.wait_all_tasks_blocked()
+
+        assert order == [(1, "a"), (2, "b"), (3, "c")]
+
+    trio.run(_test)
@@ -118,6 +118,15 @@ class TestLRUContainer(object):
         d.clear()
         assert evicted_items == [0, 1, 2, 3, 4, 5]
 
+    def test_values(self):
+        d = Container(3)
+        for i in xrange(4):
+            d[i] = str(i)
+        assert d.values() == ["1", "2", "3"]
+        # Listing the values doesn't count as accessing them.
+        d[4] = "4"
+        assert d.values() == ["2", "3", "4"]
+
     def test_iter(self):
         d = Container()
 
@@ -1,6 +1,11 @@
 from __future__ import absolute_import
 
 import ssl
+import sys
+import threading
+import time
+
+import mock
 import pytest
 
 from hip.base import Response
@@ -11,6 +16,7 @@ from hip.connectionpool import (
 )
 from hip.connection import HTTP1Connection
 from hip.response import HTTPResponse
+from hip.util.retry import Retry
 from hip.util.timeout import Timeout
 from hip.packages.six.moves.queue import Empty
 from hip.packages.ssl_match_hostname import CertificateError
@@ -34,6 +40,12 @@ from test import SHORT_TIMEOUT
 import h11
 
 
+def _connected(conn):
+    """Give a connection a fake socket that the server never drops."""
+    conn._sock = mock.Mock(is_readable=mock.Mock(return_value=False))
+    return conn
+
+
 class HTTPUnixConnection(HTTP1Connection):
     def __init__(self, host, timeout=60, **kwargs):
         super(HTTPUnixConnection, self).__init__("localhost")
@@ -470,6 +482,91 @@ class TestConnectionPool(object):
         _test(SocketError)
         _test(ProtocolError)
 
+    def _wait_in_line(self, pool, timeout=5, **kwargs):
+        # Wait for a connection on another thread, and return the list the
+        # connection is appended to once it's checked out.
+        got = []
+        waiters = len(pool.pool._waiters)
+        thread = threading.Thread(
+            target=lambda: got.append(pool._get_conn(timeout=timeout, **kwargs))
+        )
+        thread.start()
+        while len(pool.pool._waiters) == waiters:
+            time.sleep(0.001)
+        return got
+
+    def _hand_over(self, pool, conn, waiters):
+        # Put the connection back, and check the waiters get it in order.
+        for got in waiters:
+            pool._put_conn(conn)
+            while not got:
+                time.sleep(0.001)
+            conn = got[0]
+        assert not pool.pool._waiters
+
+    def test_checkout_priority(self):
+        with HTTPConnectionPool(host="localhost", maxsize=1, block=True) as pool:
+            conn = pool._get_conn()
+            bulk = self._wait_in_line(pool, priority=1)
+            first = self._wait_in_line(pool)
+            second = self._wait_in_line(pool)
+            urgent = self._wait_in_line(pool, priority=-1)
+            self._hand_over(pool, conn, [urgent, first, second, bulk])
+
+    def test_checkout_deadline_order(self):
+        with HTTPConnectionPool(
+            host="localhost", maxsize=1, block=True, checkout_order="deadline"
+        ) as pool:
+            conn = pool._get_conn()
+            late = self._wait_in_line(pool, timeout=10)
+            early = self._wait_in_line(pool, timeout=5)
+            urgent = self._wait_in_line(pool, timeout=20, priority=-1)
+            self._hand_over(pool, conn, [urgent, early, late])
+
+    def test_min_idle_larger_than_maxsize(self):
+        with pytest.raises(ValueError):
+            HTTPConnectionPool(host="localhost", maxsize=1, min_idle=2)
+
+    def test_pipeline_only_get_and_head(self):
+        with HTTPConnectionPool(host="localhost") as pool:
+            with pytest.raises(ValueError):
+                pool.pipeline("POST", ["/"])
+
+    def test_unknown_checkout_order(self):
+        with pytest.raises(ValueError):
+            HTTPConnectionPool(host="localhost", checkout_order="random")
+
+    def test_retries_dont_grow_the_stack(self):
+        def kaboom(*args, **kwargs):
+            raise SocketError("kaboom")
+
+        attempts = sys.getrecursionlimit() + 10
+        with HTTPConnectionPool(host="localhost", maxsize=1, block=True) as pool:
+            pool._make_request = kaboom
+            with pytest.raises(MaxRetryError):
+                pool.urlopen("GET", "/", retries=Retry(total=attempts - 1))
+            assert pool.stats["retries"] == attempts - 1
+            assert pool.pool.qsize() == 1
+
+    def test_retries_rewind_body(self):
+        bodies = []
+
+        def make_request(conn, method, url, body=None, **kwargs):
+            bodies.append(body.read())
+            if len(bodies) < 3:
+                raise SocketError("kaboom")
+            return Response(
+                status_code=200, headers={}, body=BytesIO(b"foo"), version=b"HTTP/1.1"
+            )
+
+        with HTTPConnectionPool(host="localhost", maxsize=1, block=True) as pool:
+            pool._make_request = make_request
+            r = pool.urlopen(
+                "PUT", "/", body=BytesIO(b"data"), retries=2, preload_content=False
+            )
+            assert r.status == 200
+            assert bodies == [b"data", b"data", b"data"]
+
     def test_custom_http_response_class(self):
         class CustomHTTPResponse(HTTPResponse):
             pass
@@ -489,3 +586,81 @@ class TestConnectionPool(object):
         with CustomConnectionPool(host="localhost", maxsize=1, block=True) as pool:
             response = pool.request("GET", "/", retries=False, preload_content=False)
             assert isinstance(response, CustomHTTPResponse)
+
+    def test_max_idle_connections(self):
+        with HTTPConnectionPool(
+            host="localhost", maxsize=3, max_idle_connections=2
+        ) as pool:
+            conns = [_connected(pool._get_conn()) for _ in range(3)]
+            for conn in conns:
+                pool._put_conn(conn)
+
+            # The least recently used connection got closed.
+            assert conns[0]._sock is None
+            assert pool.pool.qsize() == 3
+            assert list(pool.pool.queue) == [None, conns[1], conns[2]]
+            assert pool._get_conn() is conns[2]
+
+    def test_max_idle_time(self):
+        with HTTPConnectionPool(host="localhost", maxsize=2, max_idle_time=60) as pool:
+            old, new = _connected(pool._get_conn()), _connected(pool._get_conn())
+            pool._put_conn(old)
+            pool._put_conn(new)
+            pool._idle_since[old] -= 61
+
+            assert pool._reap_idle_conns() == 1
+            assert old._sock is None
+            assert new._sock is not None
+            assert list(pool.pool.queue) == [None, new]
+
+    def test_max_idle_time_reaps_dropped_connections(self):
+        with HTTPConnectionPool(host="localhost", max_idle_time=60) as pool:
+            conn = _connected(pool._get_conn())
+            pool._put_conn(conn)
+            conn._sock.is_readable.return_value = True
+
+            assert pool._reap_idle_conns() == 1
+            assert list(pool.pool.queue) == [None]
+
+    def test_dropped_connections_are_polled_without_the_queue_lock(self):
+        with HTTPConnectionPool(host="localhost", max_idle_time=60) as pool:
+            conn = _connected(pool._get_conn())
+            pool._put_conn(conn)
+
+            def is_readable():
+                assert not pool.pool.mutex.locked()
+                return True
+
+            conn._sock.is_readable.side_effect = is_readable
+            assert pool._reap_idle_conns() == 1
+            assert conn._sock is None
+
+    def test_expired_connection_reset_at_checkout(self):
+        with HTTPConnectionPool(host="localhost", max_idle_time=60) as pool:
+            conn = _connected(pool._get_conn())
+            sock = conn._sock
+            pool._put_conn(conn)
+            pool._idle_since[conn] -= 61
+
+            assert pool._get_conn() is conn
+            assert conn._sock is None
+            # Expiry is decided without polling the socket.
+            assert not sock.is_readable.called
+
+    def test_idle_reaper_thread(self):
+        with HTTPConnectionPool(host="localhost", max_idle_time=0.01) as pool:
+            conn = _connected(pool._get_conn())
+            pool._put_conn(conn)
+            assert pool._reaper_running
+
+            deadline = time.time() + 5
+            while conn._sock is not None and time.time() < deadline:
+                time.sleep(0.01)
+            assert conn._sock is None
+            assert list(pool.pool.queue) == [None]
+
+        # The reaper goes away with the pool.
+        deadline = time.time() + 5
+        while pool._reaper_running and time.time() < deadline:
+            time.sleep(0.01)
+        assert not pool._reaper_running
@@ -0,0 +1,140 @@
+import threading
+
+import pytest
+
+from hip.util.metrics import (
+    COUNTERS,
+    HISTOGRAMS,
+    HistogramSnapshot,
+    PoolStats,
+    merge_snapshots,
+    render_openmetrics,
+)
+
+
+class TestPoolStats(object):
+    def test_empty_snapshot(self):
+        snapshot = PoolStats(buckets=(0.1, 1.0)).snapshot()
+        for name in COUNTERS:
+            assert snapshot[name] == 0
+        for name in HISTOGRAMS:
+            assert snapshot[name] == HistogramSnapshot(
+                ((0.1, 0), (1.0, 0), (float("inf"), 0)), 0.0, 0
+            )
+
+    def test_increment(self):
+        stats = PoolStats()
+        stats.increment("requests")
+        stats.increment("sent_bytes", 100)
+        stats.increment("sent_bytes", 20)
+        assert stats["requests"] == 1
+        assert stats["sent_bytes"] == 120
+        assert stats.snapshot()["sent_bytes"] == 120
+
+    def test_unknown_name(self):
+        stats = PoolStats()
+        with pytest.raises(KeyError):
+            stats.increment("bogus")
+        with pytest.raises(KeyError):
+            stats.observe("bogus", 1.0)
+
+    def test_observe(self):
+        stats = PoolStats(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            stats.observe("connect_seconds", value)
+
+        histogram = stats.snapshot()["connect_seconds"]
+        assert histogram.buckets == ((0.1, 2), (1.0, 3), (float("inf"), 4))
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(2.65)
+
+    def test_snapshot_is_a_copy(self):
+        stats = PoolStats()
+        snapshot = stats.snapshot()
+        stats.increment("requests")
+        stats.observe("connect_seconds", 1.0)
+        assert snapshot["requests"] == 0
+        assert snapshot["connect_seconds"].count == 0
+
+    def test_thread_safe(self):
+        stats = PoolStats()
+
+        def work():
+            for _ in range(1000):
+                stats.increment("requests")
+                stats.observe("checkout_wait_seconds", 0.0)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        snapshot = stats.snapshot()
+        assert snapshot["requests"] == 8000
+        assert snapshot["checkout_wait_seconds"].count == 8000
+
+
+class TestMergeSnapshots(object):
+    def test_merge(self):
+        a = PoolStats(buckets=(1.0,))
+        a.increment("requests", 2)
+        a.observe("connect_seconds", 0.5)
+        b = PoolStats(buckets=(1.0,))
+        b.increment("requests", 3)
+        b.observe("connect_seconds", 5.0)
+
+        merged = merge_snapshots([a.snapshot(), b.snapshot()])
+        assert merged["requests"] == 5
+        assert merged["connect_seconds"] == HistogramSnapshot(
+            ((1.0, 1), (float("inf"), 2)), 5.5, 2
+        )
+
+    def test_merge_nothing(self):
+        assert merge_snapshots([]) == PoolStats().snapshot()
+
+    def test_merge_different_buckets(self):
+        a = PoolStats(buckets=(1.0,))
+        a.observe("connect_seconds", 0.5)
+        b = PoolStats(buckets=(2.0,))
+        b.observe("connect_seconds", 0.5)
+        with pytest.raises(ValueError):
+            merge_snapshots([a.snapshot(), b.snapshot()])
+
+
+class TestRenderOpenMetrics(object):
+    def test_render(self):
+        stats = PoolStats(buckets=(0.5,))
+        stats.increment("requests", 3)
+        stats.observe("tls_handshake_seconds", 0.25)
+        text = render_openmetrics(
+            [([("host", "example.com"), ("port", 443)], stats.snapshot())]
+        )
+        lines = text.splitlines()
+
+        assert "# TYPE hip_pool_requests counter" in lines
+        assert 'hip_pool_requests_total{host="example.com",port="443"} 3' in lines
+        assert "# TYPE hip_pool_tls_handshake_seconds histogram" in lines
+        assert (
+            'hip_pool_tls_handshake_seconds_bucket{host="example.com",port="443",'
+            'le="0.5"} 1'
+        ) in lines
+        assert (
+            'hip_pool_tls_handshake_seconds_bucket{host="example.com",port="443",'
+            'le="+Inf"} 1'
+        ) in lines
+        assert (
+            'hip_pool_tls_handshake_seconds_count{host="example.com",port="443"} 1'
+        ) in lines
+        assert (
+            'hip_pool_tls_handshake_seconds_sum{host="example.com",port="443"} 0.25'
+        ) in lines
+        assert text.endswith("# EOF\n")
+
+    def test_render_escapes_labels(self):
+        text = render_openmetrics([([("host", 'a"b\\c')], PoolStats().snapshot())])
+        assert 'hip_pool_requests_total{host="a\\"b\\\\c"} 0' in text.splitlines()
+
+    def test_render_without_labels(self):
+        text = render_openmetrics([((), PoolStats().snapshot())], prefix="app")
+        assert "app_retries_total 0" in text.splitlines()
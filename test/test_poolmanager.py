@@ -1,11 +1,14 @@
 import socket
+import sys
 
+import mock
 import pytest
 
 from hip.poolmanager import PoolManager
 from hip.poolmanager import key_fn_by_scheme, PoolKey
 from hip import connection_from_url
 from hip.exceptions import ClosedPoolError, LocationValueError
+from hip.response import HTTPResponse
 from hip.util import retry, timeout, ssl_
 
 from dummyserver.server import CERTS_PATH, DEFAULT_CA, DEFAULT_CERTS
@@ -109,6 +112,8 @@ class TestPoolManager(object):
             "retries": retry.Retry(total=6, connect=2),
             "block": True,
             "source_address": "127.0.0.1",
+            "max_idle_time": 5,
+            "max_idle_connections": 2,
         }
         p = PoolManager()
         conn_pools = [
@@ -365,3 +370,63 @@ class TestPoolManager(object):
         p = PoolManager(strict=True)
         merged = p._merge_pool_kwargs({"invalid_key": None})
         assert p.connection_pool_kw == merged
+
+    def test_redirects_dont_grow_the_stack(self):
+        hops = sys.getrecursionlimit() + 10
+        requested = []
+
+        def urlopen(method, url, **kw):
+            requested.append(url)
+            if len(requested) == hops:
+                return HTTPResponse(status=200)
+            return HTTPResponse(
+                status=302, headers={"Location": "/%d" % len(requested)}
+            )
+
+        pool = mock.Mock()
+        pool.urlopen.side_effect = urlopen
+        with PoolManager() as p:
+            p.connection_from_host = mock.Mock(return_value=pool)
+            r = p.urlopen("GET", "http://example.com/", retries=retry.Retry(total=hops))
+
+        assert r.status == 200
+        assert requested[:3] == ["/", "/1", "/2"]
+        assert len(requested) == hops
+
+    def test_evicted_pool_stats_are_always_counted(self):
+        with PoolManager(num_pools=1) as p:
+            pool = p.connection_from_url("http://a.example.com/")
+            pool.stats.increment("requests", 2)
+            seen_while_closing = []
+            close = pool.close
+
+            def close_and_scrape():
+                # The pool is out of p.pools by now, but not retired yet.
+                seen_while_closing.append(p.stats_snapshot()["requests"])
+                close()
+
+            pool.close = close_and_scrape
+            p.connection_from_url("http://b.example.com/")
+
+            assert seen_while_closing == [2]
+            assert p.stats_snapshot()["requests"] == 2
+
+    def test_retired_origins_are_bounded(self):
+        with PoolManager(num_pools=1) as p:
+            p.max_retired_origins = 2
+            for i in range(5):
+                pool = p.connection_from_url("http://%d.example.com/" % i)
+                pool.stats.increment("requests")
+
+            by_origin = p.stats_by_origin()
+            assert sorted(host for _, host, _ in by_origin) == [
+                "2.example.com",
+                "3.example.com",
+                "4.example.com",
+            ]
+            # The forgotten origins still count towards the totals.
+            assert p.stats_snapshot()["requests"] == 5
+            assert p.seen_origins() == [
+                "http://3.example.com:80",
+                "http://4.example.com:80",
+            ]
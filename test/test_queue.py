@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+from hip.packages.six.moves import queue
+from hip.util.queue import LifoQueue
+
+
+def _start_waiters(q, keys):
+    """
+    Start a thread waiting on ``q`` for every key, one after the other, and
+    return the list the items they get are stored in.
+    """
+    results = [None] * len(keys)
+    threads = []
+
+    def waiter(index, key):
+        results[index] = q.get(timeout=5, key=key)
+
+    for index, key in enumerate(keys):
+        thread = threading.Thread(target=waiter, args=(index, key))
+        thread.start()
+        threads.append(thread)
+        while len(q._waiters) < len(threads):
+            time.sleep(0.001)
+    return results, threads
+
+
+class TestLifoQueue(object):
+    def test_lifo(self):
+        q = LifoQueue(3)
+        for item in (1, 2, 3):
+            q.put(item)
+        assert [q.get(), q.get(), q.get()] == [3, 2, 1]
+        with pytest.raises(queue.Empty):
+            q.get(block=False)
+
+    def test_waiters_are_served_in_key_order(self):
+        q = LifoQueue(1)
+        results, threads = _start_waiters(q, [(1, 0), (0, 0), (1, 1), (0, 1)])
+
+        for item in range(4):
+            q.put(item)
+        for thread in threads:
+            thread.join()
+
+        assert results == [2, 0, 3, 1]
+
+    def test_equal_keys_are_served_first_come_first_served(self):
+        q = LifoQueue(1)
+        results, threads = _start_waiters(q, [0, 0, 0])
+
+        for item in ("a", "b", "c"):
+            q.put(item)
+        for thread in threads:
+            thread.join()
+
+        assert results == ["a", "b", "c"]
+
+    def test_timed_out_waiter_is_skipped(self):
+        q = LifoQueue(1)
+        with pytest.raises(queue.Empty):
+            q.get(timeout=0.01, key=-1)
+        assert len(q._waiters) == 0
+
+        results, threads = _start_waiters(q, [1])
+        q.put("item")
+        threads[0].join()
+        assert results == ["item"]
+        assert q.qsize() == 0
+
+    def test_timed_out_waiters_dont_pile_up(self):
+        q = LifoQueue(1)
+        for _ in range(100):
+            with pytest.raises(queue.Empty):
+                q.get(timeout=0)
+        assert len(q._waiters._heap) <= 16
@@ -375,6 +375,100 @@ class TestConnectionPool(HTTPDummyServerTestCase):
             assert pool.num_connections == 1
             assert pool.num_requests == 2
 
+    def test_prefill(self):
+        with HTTPConnectionPool(self.host, self.port, maxsize=3) as pool:
+            assert pool.prefill(2) == 2
+            assert pool.num_connections == 2
+            assert pool.pool.filled_slots() == 2
+            # Already warm, nothing left to do.
+            assert pool.prefill(2) == 0
+            assert pool.prefill() == 1
+            assert pool.pool.filled_slots() == 3
+
+            r = pool.request("GET", "/")
+            assert r.status == 200
+            assert pool.num_connections == 3
+
+    def test_prefill_connection_refused(self):
+        port = find_unused_port()
+        with HTTPConnectionPool(self.host, port) as pool:
+            with pytest.raises(NewConnectionError):
+                pool.prefill(1)
+            assert pool.pool.filled_slots() == 0
+
+    def test_min_idle(self):
+        with HTTPConnectionPool(self.host, self.port, maxsize=2, min_idle=2) as pool:
+            pool.REAPER_INTERVAL = 0.01
+            r = pool.request("GET", "/")
+            assert r.status == 200
+
+            deadline = time.time() + LONG_TIMEOUT
+            while pool.pool.filled_slots() < 2 and time.time() < deadline:
+                time.sleep(0.01)
+            assert pool.pool.filled_slots() == 2
+
+    def test_min_idle_while_saturated(self):
+        with HTTPConnectionPool(
+            self.host, self.port, maxsize=2, block=True, min_idle=2
+        ) as pool:
+            pool.REAPER_INTERVAL = 0.01
+            conns = [pool._get_conn(), pool._get_conn()]
+            for conn in conns:
+                conn.connect()
+            created = pool.num_connections
+
+            # All connections are checked out, so there's no room for more.
+            time.sleep(0.2)
+            assert pool.num_connections == created
+            assert pool.prefill() == 0
+            assert pool.num_connections == created
+
+            for conn in conns:
+                pool._put_conn(conn)
+
+    def test_stats(self):
+        with HTTPConnectionPool(self.host, self.port, maxsize=1) as pool:
+            pool.request("GET", "/")
+            pool.request("GET", "/echo", body=b"x" * 100)
+
+            snapshot = pool.stats.snapshot()
+            assert snapshot["requests"] == 2
+            assert snapshot["connections_created"] == 1
+            assert snapshot["checkout_misses"] == 1
+            assert snapshot["checkout_hits"] == 1
+            assert snapshot["connections_discarded"] == 0
+            assert snapshot["sent_bytes"] > 100
+            assert snapshot["received_bytes"] > 100
+            assert snapshot["checkout_wait_seconds"].count == 2
+            assert snapshot["connect_seconds"].count == 1
+            assert snapshot["tls_handshake_seconds"].count == 0
+
+            # Two connections are open at once, but only one fits back in.
+            r1 = pool.request("GET", "/", preload_content=False)
+            r2 = pool.request("GET", "/", preload_content=False)
+            r1.read()
+            r2.read()
+            assert pool.stats["connections_discarded"] == 1
+
+            text = pool.render_metrics()
+            assert (
+                'hip_pool_requests_total{scheme="http",host="%s",port="%d"} 4'
+                % (self.host, self.port)
+            ) in text.splitlines()
+
+    def test_stats_retries(self):
+        with HTTPConnectionPool(self.host, self.port) as pool:
+            retry = Retry(total=1, status_forcelist=[418])
+            r = pool.request(
+                "GET",
+                "/successful_retry",
+                headers={"test-name": "test_stats_retries"},
+                retries=retry,
+            )
+            assert r.status == 200
+            assert pool.stats["retries"] == 1
+            assert pool.num_requests == 2
+
     def test_keepalive_close(self):
         with HTTPConnectionPool(
             self.host, self.port, block=True, maxsize=1, timeout=2
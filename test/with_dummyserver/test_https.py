@@ -99,6 +99,15 @@ class TestHTTPS(HTTPSDummyServerTestCase):
         r = self._pool.request("GET", "/")
         assert r.status == 200, r.data
 
+    def test_tls_handshake_stats(self):
+        r = self._pool.request("GET", "/")
+        assert r.status == 200, r.data
+
+        snapshot = self._pool.stats.snapshot()
+        assert snapshot["connect_seconds"].count == 1
+        assert snapshot["tls_handshake_seconds"].count == 1
+        assert snapshot["tls_handshake_seconds"].sum > 0
+
     @fails_on_travis_gce
     def test_dotted_fqdn(self):
         with HTTPSConnectionPool(
@@ -11,6 +11,7 @@ from hip.exceptions import MaxRetryError, NewConnectionError
 from hip.util.retry import Retry, RequestHistory
 
 from test import LONG_TIMEOUT
+from ..port_helpers import find_unused_port
 
 # Retry failed tests
 pytestmark = pytest.mark.flaky
@@ -356,6 +357,53 @@ class TestPoolManager(HTTPDummyServerTestCase):
             # the pool should still contain poolsize elements
             assert pool.pool.qsize() == poolsize
 
+    def test_warm(self):
+        with PoolManager(maxsize=2) as http:
+            http.request("GET", self.base_url)
+            assert http.seen_origins() == [self.base_url]
+
+        with PoolManager(maxsize=2) as http:
+            http.warm([self.base_url + "/index"], connections_per_host=2)
+            pool = http.connection_from_url(self.base_url)
+            assert pool.num_connections == 2
+            assert pool.pool.filled_slots() == 2
+
+    def test_warm_skips_unreachable_origins(self):
+        unreachable = "http://%s:%d" % (self.host, find_unused_port())
+        with PoolManager() as http:
+            http.warm([unreachable, self.base_url])
+            assert http.connection_from_url(self.base_url).num_connections == 1
+
+    def test_stats(self):
+        with PoolManager(num_pools=1) as http:
+            http.request("GET", self.base_url)
+            http.request("GET", self.base_url)
+            # Evicts the first pool, its stats have to be kept.
+            http.request("GET", self.base_url_alt)
+
+            snapshot = http.stats_snapshot()
+            assert snapshot["requests"] == 3
+            assert snapshot["connections_created"] == 2
+            assert snapshot["checkout_hits"] == 1
+
+            by_origin = http.stats_by_origin()
+            assert by_origin[("http", self.host, self.port)]["requests"] == 2
+            assert by_origin[("http", self.host_alt, self.port)]["requests"] == 1
+
+            http.request("GET", self.base_url)
+            by_origin = http.stats_by_origin()
+            assert by_origin[("http", self.host, self.port)]["requests"] == 3
+
+            lines = http.render_metrics().splitlines()
+            assert (
+                'hip_pool_requests_total{scheme="http",host="%s",port="%d"} 3'
+                % (self.host, self.port)
+            ) in lines
+            assert (
+                'hip_pool_requests_total{scheme="http",host="%s",port="%d"} 1'
+                % (self.host_alt, self.port)
+            ) in lines
+
 
 class TestRetry(HTTPDummyServerTestCase):
     @classmethod
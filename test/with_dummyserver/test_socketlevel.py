@@ -37,6 +37,7 @@ except ImportError:
 
 from collections import OrderedDict
 from threading import Event
+import threading
 import io
 import select
 import socket
@@ -46,9 +47,17 @@ import mock
 
 import pytest
 
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+except ImportError:
+    h2 = None
+
 from test import (
     notPyPy2,
     fails_on_travis_gce,
+    onlyH2,
     requires_ssl_context_keyfile_password,
     SHORT_TIMEOUT,
     LONG_TIMEOUT,
@@ -897,7 +906,7 @@ class TestSocketClosing(SocketDummyServerTestCase):
 
             # The connection should still be on the response object, and none
             # should be in the pool. We opened two though.
-            assert pool.num_connections == 2
+            assert pool.stats["connections_dropped"] == 1
             assert pool.pool.qsize() == 0
             assert response.connection is not None
 
@@ -1908,3 +1917,239 @@ class TestRetryPoolSizeDrainFail(SocketDummyServerTestCase):
         ) as pool:
             pool.urlopen("GET", "/not_found", preload_content=False)
             assert pool.num_connections == 1
+
+
+def _read_requests(sock, n):
+    buf = b""
+    while buf.count(b"\r\n\r\n") < n:
+        buf += sock.recv(65536)
+    return [request.split(b" ")[1] for request in buf.split(b"\r\n\r\n") if request]
+
+
+def _pipelined_response(body, head=False):
+    response = b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n" % len(body)
+    return response if head else response + body
+
+
+class TestPipelining(SocketDummyServerTestCase):
+    def test_responses_are_matched_in_order(self):
+        received = []
+
+        def socket_handler(listener):
+            sock = listener.accept()[0]
+            targets = _read_requests(sock, 3)
+            received.extend(targets)
+            sock.send(b"".join(_pipelined_response(t) for t in targets))
+            # The connection is kept alive for later requests.
+            targets = _read_requests(sock, 1)
+            sock.send(_pipelined_response(targets[0]))
+            sock.close()
+
+        self._start_server(socket_handler)
+        with HTTPConnectionPool(self.host, self.port) as pool:
+            responses = pool.pipeline("GET", ["/a", "/b", "/c"], retries=0)
+            assert [r.data for r in responses] == [b"/a", b"/b", b"/c"]
+            assert received == [b"/a", b"/b", b"/c"]
+
+            assert pool.request("GET", "/d", retries=0).data == b"/d"
+            assert pool.num_connections == 1
+
+    def test_server_closing_mid_pipeline(self):
+        def socket_handler(listener):
+            sock = listener.accept()[0]
+            targets = _read_requests(sock, 3)
+            # Only answer the first one, and hang up.
+            sock.send(_pipelined_response(targets[0]))
+            sock.close()
+
+            sock = listener.accept()[0]
+            targets = _read_requests(sock, 2)
+            sock.send(b"".join(_pipelined_response(t) for t in targets))
+            sock.close()
+
+        self._start_server(socket_handler)
+        with HTTPConnectionPool(self.host, self.port) as pool:
+            responses = pool.pipeline("GET", ["/a", "/b", "/c"], retries=0)
+            assert [r.data for r in responses] == [b"/a", b"/b", b"/c"]
+            assert pool.stats["connections_dropped"] == 1
+
+    def test_max_depth(self):
+        def socket_handler(listener):
+            sock = listener.accept()[0]
+            for n in (2, 1):
+                targets = _read_requests(sock, n)
+                sock.send(b"".join(_pipelined_response(t, head=True) for t in targets))
+            sock.close()
+
+        self._start_server(socket_handler)
+        with HTTPConnectionPool(self.host, self.port) as pool:
+            responses = pool.pipeline("HEAD", ["/a", "/b", "/c"], max_depth=2)
+            assert [r.status for r in responses] == [200, 200, 200]
+            assert [r.data for r in responses] == [b"", b"", b""]
+            assert pool.num_connections == 1
+
+    def test_out_of_sync_pipeline_fails(self):
+        def socket_handler(listener):
+            sock = listener.accept()[0]
+            targets = _read_requests(sock, 2)
+            # Bodies on responses to HEAD requests throw the framing off.
+            sock.send(b"".join(_pipelined_response(t) for t in targets))
+            sock.close()
+
+        self._start_server(socket_handler)
+        with HTTPConnectionPool(self.host, self.port) as pool:
+            with pytest.raises(MaxRetryError) as e:
+                pool.pipeline("HEAD", ["/a", "/b"], retries=0)
+            assert isinstance(e.value.reason, ProtocolError)
+
+
+class _H2Server(object):
+    """
+    The server side of an HTTP/2 connection on ``sock``.
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        config = h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        self.conn = h2.connection.H2Connection(config=config)
+        self.conn.initiate_connection()
+        self.sock.sendall(self.conn.data_to_send())
+        self.requests = OrderedDict()
+        self.bodies = {}
+
+    def read_requests(self, n):
+        """
+        Read until ``n`` more requests were received in full, and return their
+        stream IDs.
+        """
+        done = []
+        while len(done) < n:
+            data = self.sock.recv(65536)
+            if not data:
+                break
+            for event in self.conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    self.requests[event.stream_id] = dict(event.headers)
+                    self.bodies[event.stream_id] = b""
+                elif isinstance(event, h2.events.DataReceived):
+                    self.bodies[event.stream_id] += event.data
+                    self.conn.acknowledge_received_data(
+                        event.flow_controlled_length, event.stream_id
+                    )
+                elif isinstance(event, h2.events.StreamEnded):
+                    done.append(event.stream_id)
+            self.sock.sendall(self.conn.data_to_send())
+        return done
+
+    def respond(self, stream_id, body):
+        self.conn.send_headers(
+            stream_id, [(":status", "200"), ("content-length", str(len(body)))]
+        )
+        self.conn.send_data(stream_id, body, end_stream=True)
+        self.sock.sendall(self.conn.data_to_send())
+
+
+@onlyH2()
+class TestHTTP2(SocketDummyServerTestCase):
+    def test_concurrent_requests_share_a_connection(self):
+        def socket_handler(listener):
+            server = _H2Server(listener.accept()[0])
+            # Nothing is answered before all of the requests arrived.
+            stream_ids = server.read_requests(3)
+            for stream_id in reversed(stream_ids):
+                path = server.requests[stream_id][":path"]
+                server.respond(stream_id, path.encode("ascii"))
+            server.read_requests(1)
+            server.sock.close()
+
+        self._start_server(socket_handler)
+        results = {}
+        with HTTPConnectionPool(
+            self.host, self.port, http2=True, maxsize=1, block=True
+        ) as pool:
+
+            def request(path):
+                results[path] = pool.request("GET", path, retries=0).data
+
+            threads = [
+                threading.Thread(target=request, args=("/%d" % i,)) for i in range(3)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(LONG_TIMEOUT * 100)
+
+            assert results == {"/0": b"/0", "/1": b"/1", "/2": b"/2"}
+            assert pool.num_connections == 1
+
+    def test_request_body_larger_than_the_window(self):
+        body = b"x" * 200000
+
+        def socket_handler(listener):
+            server = _H2Server(listener.accept()[0])
+            (stream_id,) = server.read_requests(1)
+            server.respond(stream_id, str(len(server.bodies[stream_id])).encode())
+            server.read_requests(1)
+            server.sock.close()
+
+        self._start_server(socket_handler)
+        with HTTPConnectionPool(self.host, self.port, http2=True) as pool:
+            r = pool.request("POST", "/", body=body, retries=0)
+            assert r.data == b"200000"
+            assert r.version == b"HTTP/2"
+
+    def test_goaway_is_noticed_before_the_next_request(self):
+        def socket_handler(listener):
+            for _ in range(2):
+                server = _H2Server(listener.accept()[0])
+                (stream_id,) = server.read_requests(1)
+                server.respond(stream_id, b"hi")
+                server.conn.close_connection()
+                server.sock.sendall(server.conn.data_to_send())
+                server.sock.close()
+
+        self._start_server(socket_handler)
+        with HTTPConnectionPool(self.host, self.port, http2=True) as pool:
+            assert pool.request("GET", "/", retries=0).data == b"hi"
+            assert pool.request("GET", "/", retries=0).data == b"hi"
+            assert pool.stats["connections_dropped"] == 1
+
+    def _start_tls_server(self, alpn_protocols, respond):
+        def socket_handler(listener):
+            sock = listener.accept()[0]
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(DEFAULT_CERTS["certfile"], DEFAULT_CERTS["keyfile"])
+            context.set_alpn_protocols(alpn_protocols)
+            ssl_sock = context.wrap_socket(sock, server_side=True)
+            respond(ssl_sock)
+            ssl_sock.close()
+
+        self._start_server(socket_handler)
+
+    def test_h2_is_negotiated_with_alpn(self):
+        def respond(sock):
+            server = _H2Server(sock)
+            (stream_id,) = server.read_requests(1)
+            scheme = server.requests[stream_id][":scheme"]
+            server.respond(stream_id, scheme.encode("ascii"))
+
+        self._start_tls_server(["h2", "http/1.1"], respond)
+        with HTTPSConnectionPool(
+            self.host, self.port, http2=True, ca_certs=DEFAULT_CA
+        ) as pool:
+            r = pool.request("GET", "/", retries=0)
+            assert r.data == b"https"
+            assert r.version == b"HTTP/2"
+
+    def test_falls_back_to_http11(self):
+        def respond(sock):
+            consume_socket(sock)
+            sock.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nhi")
+
+        self._start_tls_server(["http/1.1"], respond)
+        with HTTPSConnectionPool(
+            self.host, self.port, http2=True, ca_certs=DEFAULT_CA
+        ) as pool:
+            r = pool.request("GET", "/", retries=0)
+            assert r.data == b"hi"
+            assert r.version == b"HTTP/1.1"